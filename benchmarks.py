@@ -0,0 +1,77 @@
+"""
+Micro-benchmarks for the cost of crossing between Yeep and Python, and of running scripts.
+
+Run with: python benchmarks.py
+"""
+
+import time
+
+import yeep
+
+CALLS = 20000
+
+def timed(label, fn, calls=CALLS):
+  start = time.perf_counter()
+  fn()
+  elapsed = time.perf_counter() - start
+  print(f'{label:<40} {elapsed * 1e6 / calls:8.2f} us/call')
+
+def run(text):
+  _, error = yeep.run('<benchmark>', text)
+  if error: raise RuntimeError(error.as_string())
+
+def loop(body):
+  return f'FOR i = 0 TO {CALLS} THEN VAR r = {body}'
+
+def bench_ffi():
+  def add(a, b): return a + b
+  def total(xs): return sum(xs)
+
+  yeep.expose("PY_ADD", add)
+  yeep.expose("PY_TOTAL", total)
+  yeep.expose("PY_DATA", [float(i) for i in range(1000)])
+  run('FUN yeep_add(a, b) -> a + b\nVAR yeep_data = TO_LIST(RANGE(0, 1000, 1))')
+
+  timed('python add, called from python', lambda: [add(i, 1) for i in range(CALLS)])
+  timed('empty yeep loop', lambda: run(loop('i')))
+  timed('yeep function call', lambda: run(loop('yeep_add(i, 1)')))
+  timed('built-in call (LEN)', lambda: run(loop('LEN(PY_DATA)')))
+  timed('python function call (PY_ADD)', lambda: run(loop('PY_ADD(i, 1)')))
+  timed('python sum over a wrapped python list', lambda: run(loop('PY_TOTAL(PY_DATA)')), CALLS)
+  timed('python sum over a viewed yeep list', lambda: run(loop('PY_TOTAL(yeep_data)')), CALLS)
+
+def bench_program():
+  text = 'VAR total = price * quantity\nIF total > 100 THEN total - 10 ELSE total'
+  inputs = {"price": 12.5, "quantity": 9}
+  program, error = yeep.compile('<benchmark>', text)
+  if error: raise RuntimeError(error.as_string())
+
+  def run_each():
+    for _ in range(CALLS):
+      yeep.global_symbol_table.set("price", yeep.Number(12.5))
+      yeep.global_symbol_table.set("quantity", yeep.Number(9))
+      run(text)
+
+  timed('rule script, run() per call', run_each)
+  timed('rule script, compiled once', lambda: [program.execute(inputs=inputs) for _ in range(CALLS)])
+
+def bench_batch():
+  program, error = yeep.compile('<benchmark>', 'price * quantity * (1 - discount)')
+  if error: raise RuntimeError(error.as_string())
+  columns = {
+    "price": [float(i % 97) for i in range(CALLS)],
+    "quantity": [i % 5 for i in range(CALLS)],
+    "discount": [0.1] * CALLS,
+  }
+
+  def per_row():
+    for price, quantity, discount in zip(*columns.values()):
+      program.execute(inputs={"price": price, "quantity": quantity, "discount": discount})
+
+  timed('scoring rule, executed per row', per_row)
+  timed('scoring rule, evaluated as a batch', lambda: program.evaluate_batch(columns))
+
+if __name__ == '__main__':
+  bench_ffi()
+  bench_program()
+  bench_batch()
@@ -0,0 +1,19 @@
+import yeep
+
+def read_csv(tmp_path, text, header):
+  path = tmp_path / 'data.csv'
+  path.write_text(text)
+  value, error = yeep.run('<test>', f'TO_LIST(CSV_ROWS("{path}", {"TRUE" if header else "FALSE"}))')
+  assert error is None, error.as_string()
+  return yeep.to_python(value)[-1]
+
+def test_csv_cell_types_do_not_depend_on_the_header_flag(tmp_path):
+  text = 'a,b,id\n1,nan,007\n2.5,3,8\n'
+  # repr, since 1 == 1.0 would hide an int read back as a float
+  assert repr(read_csv(tmp_path, text, True)) == repr([{'a': 1, 'b': 'nan', 'id': '007'}, {'a': 2.5, 'b': 3, 'id': 8}])
+  assert repr(read_csv(tmp_path, text, False)) == repr([['a', 'b', 'id'], [1, 'nan', '007'], [2.5, 3, 8]])
+
+def test_csv_cell_types_do_not_depend_on_batching(tmp_path):
+  rows = [str(i) for i in range(yeep.ROW_BATCH_SIZE)] + ['0.5'] + [str(i) for i in range(yeep.ROW_BATCH_SIZE)]
+  values = [row[0] for row in read_csv(tmp_path, '\n'.join(rows) + '\n', False)]
+  assert [type(value) for value in values] == [float if '.' in row else int for row in rows]
@@ -0,0 +1,26 @@
+import pytest
+
+import yeep
+
+def test_generator_yields_lazily():
+  value, error = yeep.run('<test>', 'FUN g()\nYIELD 1\nYIELD 2\nEND\nTO_LIST(g())')
+  assert error is None
+  assert yeep.to_python(value.elements[-1]) == [1, 2]
+
+def test_generator_iterating_itself_fails():
+  value, error = yeep.run('<test>', 'FUN g()\nFOR y IN gg THEN YIELD y\nEND\nVAR gg = g()\nTO_LIST(gg)')
+  assert value is None
+  assert "already executing" in error.as_string()
+
+def test_exception_in_generator_body_reaches_consumer(monkeypatch):
+  def fail(fn):
+    raise TypeError("failed")
+
+  monkeypatch.setitem(yeep.BUILTINS, "FAIL", yeep.BuiltInFunction("fail", fail, 0))
+  with pytest.raises(TypeError):
+    yeep.run('<test>', 'FUN g()\nYIELD 1\nYIELD FAIL()\nEND\nTO_LIST(g())')
+
+def test_runtime_error_in_generator_body_reaches_consumer():
+  value, error = yeep.run('<test>', 'FUN g()\nYIELD 1\nYIELD "ab" * 2.5\nEND\nTO_LIST(g())')
+  assert value is None
+  assert "Illegal operation" in error.as_string()
@@ -0,0 +1,17 @@
+import io
+
+import pytest
+
+import yeep
+
+def numbers(text):
+  source = yeep.InputSource(io.StringIO(text), strict=True)
+  return [number.value for number in source.numbers()]
+
+def test_input_numbers():
+  assert numbers('1 2\n3.5 -4\n') == [1, 2, 3.5, -4]
+
+@pytest.mark.parametrize('text', ['1_000 007 3', '1_000 007 3.5', 'nan 1', '1 inf'])
+def test_input_numbers_rejects_non_decimal_tokens(text):
+  with pytest.raises(ValueError):
+    numbers(text)
@@ -0,0 +1,33 @@
+import yeep
+
+def evaluate_both(text, columns, env=None):
+  program, error = yeep.compile('<test>', text)
+  assert error is None, error.as_string()
+
+  results = []
+  for enabled in (True, False):
+    engine = yeep.Engine()
+    engine.vectorizer.enabled = enabled
+    column, error = engine.evaluate_batch(program, columns, env)
+    assert error is None, error.as_string()
+    results.append(column)
+  return results
+
+def test_batch_matches_row_by_row():
+  columns = {"price": [1.5, 2, 0, 10], "qty": [3, 4, 5, 6]}
+  for text in ['price * qty', 'price * qty - qty / 2', '-price + 1', 'price > qty', '7']:
+    batch, rows = evaluate_both(text, columns)
+    assert batch == rows, text
+
+def test_column_shadows_list_in_env():
+  env = yeep.SymbolTable(yeep.builtin_symbol_table)
+  env.set("x", yeep.List([yeep.Number(5), yeep.Number(6), yeep.Number(7)]))
+  batch, rows = evaluate_both('x / 2', {"x": [4, 8]}, env)
+  assert batch == rows == [2.0, 4.0]
+
+def test_execute_uses_fresh_globals():
+  program, _ = yeep.compile('<test>', 'VAR y = x * 2\ny')
+  value, error = program.execute(inputs={"x": 3})
+  assert error is None and yeep.to_python(value) == [6, 6]
+  _, error = yeep.compile('<test>', 'y')[0].execute()
+  assert error is not None
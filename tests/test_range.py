@@ -0,0 +1,22 @@
+import yeep
+
+def run(text):
+  value, error = yeep.run('<test>', text)
+  assert error is None, error.as_string()
+  return yeep.to_python(value)[-1]
+
+def test_float_range_is_consistent():
+  for args in ['0, 1, 0.1', '0, 0.7, 0.1', '1, 0, -0.1', '0.5, 3, 0.25', '0, 1, 0.3', '1, 1, 0.5']:
+    length, listed, items, indexed, truth = run(
+      f'VAR r = RANGE({args})\nVAR l = TO_LIST(r)\n'
+      f'[LEN(r), LEN(l), l, MAP(RANGE(0, LEN(r), 1), FUN (k) -> r / k), IF r THEN 1 ELSE 0]'
+    )
+    assert length == listed == len(items), args
+    assert indexed == items, args
+    assert truth == (1 if length else 0), args
+
+def test_float_range_elements():
+  assert run('TO_LIST(RANGE(0, 1, 0.1))') == [k * 0.1 for k in range(10)]
+
+def test_int_range():
+  assert run('[LEN(RANGE(0, 10, 3)), TO_LIST(RANGE(0, 10, 3)), RANGE(10, 0, -3) / -1]') == [4, [0, 3, 6, 9], 1]
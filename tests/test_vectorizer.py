@@ -0,0 +1,38 @@
+import yeep
+
+def run_both(text):
+  results = []
+  for enabled in (True, False):
+    engine = yeep.Engine()
+    engine.vectorizer.enabled = enabled
+    value, error = engine.run('<test>', text)
+    assert error is None, error.as_string()
+    results.append(yeep.to_python(value))
+  return results
+
+def test_vectorized_loops_match_scalar_loops():
+  loops = [
+    'VAR out = []\nFOR i = 0 TO 50 THEN APPEND(out, i * 2 + 1)\nout',
+    'VAR out = []\nFOR i = 10 TO 0 STEP -3 THEN APPEND(out, -i / 4)\nout',
+    'VAR out = []\nVAR k = 2.5\nFOR i = 0 TO 20 THEN APPEND(out, i * k - (i > 5))\nout',
+    'VAR data = [5, 6, 7, 8]\nVAR out = []\nFOR i = 0 TO 4 THEN APPEND(out, data / i * 2)\nout',
+  ]
+  for text in loops:
+    vectorized, scalar = run_both(text)
+    assert vectorized == scalar, text
+
+def test_loop_variable_shadows_list():
+  text = 'VAR i = [10, 20, 30]\nVAR out = []\nFOR i = 0 TO 3 THEN APPEND(out, i / 2)\nout'
+  vectorized, scalar = run_both(text)
+  assert vectorized == scalar
+  assert vectorized[-1] == [0.0, 0.5, 1.0]
+
+def test_report_keeps_programs_with_the_same_file_name_apart():
+  engine = yeep.Engine()
+  engine.run('<stdin>', 'VAR a = []\nFOR i = 0 TO 10 THEN APPEND(a, i)')
+  engine.run('<stdin>', 'VAR b = []\nFOR j = 0 TO 5 THEN APPEND(b, j * 2)')
+  engine.run('<stdin>', 'VAR a = []\nFOR i = 0 TO 10 THEN APPEND(a, i)')
+  assert engine.vectorizer.report() == [
+    '<stdin> (program 1):2:5: 20 iterations vectorized',
+    '<stdin> (program 2):2:5: 5 iterations vectorized',
+  ]
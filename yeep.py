@@ -7,7 +7,29 @@ from arrow_strings import *
 
 import string
 import os
+import sys
+import io
+import gzip
+import bz2
+import lzma
 import math
+import re
+import csv
+import json
+import mmap
+import bisect
+import heapq
+import operator
+import array
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from itertools import count, repeat
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
 
 """
 This file contains the implementation of a simple programming language interpreter.
@@ -57,6 +79,11 @@ The interpreter includes a lexer, parser, and AST nodes for performing arithmeti
 DIGITS = '0123456789'
 LETTERS = string.ascii_letters
 LETTERS_DIGITS = LETTERS + DIGITS
+FILE_BUFFER_SIZE = 1 << 20
+MMAP_THRESHOLD = 1 << 24
+OUTPUT_BUFFER_SIZE = 1 << 16
+ROW_BATCH_SIZE = 1024
+FILE_ERRORS = (OSError, EOFError, UnicodeError, lzma.LZMAError)
 
 #################################################################################################
 #####   ERROR
@@ -251,6 +278,11 @@ TT_LPAREN   	= 'LPAREN'
 TT_RPAREN   	= 'RPAREN'
 TT_LSQUARE    = 'LSQUARE'
 TT_RSQUARE    = 'RSQUARE'
+TT_LBRACE     = 'LBRACE'
+TT_RBRACE     = 'RBRACE'
+TT_COLON      = 'COLON'
+TT_PIPE       = 'PIPE'
+TT_DOT        = 'DOT'
 TT_EE					= 'EE'
 TT_NE					= 'NE'
 TT_LT					= 'LT'
@@ -280,6 +312,9 @@ KEYWORDS = [
   'RETURN',
   'CONTINUE',
   'BREAK',
+  'IN',
+  'YIELD',
+  'RECORD',
 ]
 
 class Token:
@@ -383,10 +418,26 @@ class Lexer:
       elif self.current_char == ']':
         tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
         self.advance()
+      elif self.current_char == '{':
+        tokens.append(Token(TT_LBRACE, pos_start=self.pos))
+        self.advance()
+      elif self.current_char == '}':
+        tokens.append(Token(TT_RBRACE, pos_start=self.pos))
+        self.advance()
+      elif self.current_char == ':':
+        tokens.append(Token(TT_COLON, pos_start=self.pos))
+        self.advance()
+      elif self.current_char == '.':
+        tokens.append(Token(TT_DOT, pos_start=self.pos))
+        self.advance()
       elif self.current_char == '!':
         token, error = self.make_not_equals()
         if error: return [], error
         tokens.append(token)
+      elif self.current_char == '|':
+        token, error = self.make_pipe()
+        if error: return [], error
+        tokens.append(token)
       elif self.current_char == '=':
         tokens.append(self.make_equals())
       elif self.current_char == '<':
@@ -436,19 +487,21 @@ class Lexer:
 
     escape_characters = {
       'n': '\n',
-      't': '\t'
+      't': '\t',
+      '"': '"',
+      '\\': '\\'
     }
 
     while self.current_char != None and (self.current_char != '"' or escape_character):
       if escape_character:
-        string += escape_characters.get(self.current_char, self.current_char)
+        string += escape_characters.get(self.current_char, '\\' + self.current_char)
+        escape_character = False
       else:
         if self.current_char == '\\':
           escape_character = True
         else:
           string += self.current_char
       self.advance()
-      escape_character = False
     
     self.advance()
     return Token(TT_STRING, string, pos_start, self.pos)
@@ -494,6 +547,20 @@ class Lexer:
 
     self.advance()
     return None, ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
+
+  def make_pipe(self):
+    """
+        Tokenize a pipe operator '|>' and return the corresponding token.
+    """
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '>':
+      self.advance()
+      return Token(TT_PIPE, pos_start=pos_start, pos_end=self.pos), None
+
+    self.advance()
+    return None, ExpectedCharError(pos_start, self.pos, "'>' (after '|')")
   
   def make_equals(self):
     """
@@ -578,6 +645,13 @@ class ListNode:
     self.pos_start = pos_start
     self.pos_end = pos_end
 
+class DictNode:
+  def __init__(self, pair_nodes, pos_start, pos_end):
+    self.pair_nodes = pair_nodes
+
+    self.pos_start = pos_start
+    self.pos_end = pos_end
+
 class VarAccessNode:
   def __init__(self, var_name_tok):
     self.var_name_tok = var_name_tok
@@ -632,6 +706,17 @@ class ForNode:
     self.step_value_node = step_value_node
     self.body_node = body_node
     self.should_return_null = should_return_null
+    self.vector_plan = None
+
+    self.pos_start = self.var_name_tok.pos_start
+    self.pos_end = self.body_node.pos_end
+
+class ForInNode:
+  def __init__(self, var_name_tok, iterable_node, body_node, should_return_null):
+    self.var_name_tok = var_name_tok
+    self.iterable_node = iterable_node
+    self.body_node = body_node
+    self.should_return_null = should_return_null
 
     self.pos_start = self.var_name_tok.pos_start
     self.pos_end = self.body_node.pos_end
@@ -646,11 +731,12 @@ class WhileNode:
     self.pos_end = self.body_node.pos_end
 
 class FuncDefNode:
-  def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
+  def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return, is_generator=False):
     self.var_name_tok = var_name_tok
     self.arg_name_toks = arg_name_toks
     self.body_node = body_node
     self.should_auto_return = should_auto_return
+    self.is_generator = is_generator
 
     if self.var_name_tok:
       self.pos_start = self.var_name_tok.pos_start
@@ -661,6 +747,32 @@ class FuncDefNode:
 
     self.pos_end = self.body_node.pos_end
 
+class PipeNode:
+  def __init__(self, source_node, stage_nodes):
+    self.source_node = source_node
+    self.stage_nodes = stage_nodes
+
+    self.pos_start = self.source_node.pos_start
+    self.pos_end = self.stage_nodes[len(self.stage_nodes) - 1].pos_end
+
+class RecordDefNode:
+  def __init__(self, record_name_tok, field_name_toks, pos_start, pos_end):
+    self.record_name_tok = record_name_tok
+    self.field_name_toks = field_name_toks
+    self.layout = None
+
+    self.pos_start = pos_start
+    self.pos_end = pos_end
+
+class FieldAccessNode:
+  def __init__(self, record_node, field_name_tok, offset):
+    self.record_node = record_node
+    self.field_name_tok = field_name_tok
+    self.offset = offset
+
+    self.pos_start = self.record_node.pos_start
+    self.pos_end = self.field_name_tok.pos_end
+
 class CallNode:
   def __init__(self, node_to_call, arg_nodes):
     self.node_to_call = node_to_call
@@ -680,6 +792,13 @@ class ReturnNode:
     self.pos_start = pos_start
     self.pos_end = pos_end
 
+class YieldNode:
+  def __init__(self, node_to_yield, pos_start, pos_end):
+    self.node_to_yield = node_to_yield
+
+    self.pos_start = pos_start
+    self.pos_end = pos_end
+
 class ContinueNode:
   def __init__(self, pos_start, pos_end):
     self.pos_start = pos_start
@@ -747,6 +866,9 @@ class Parser:
   def __init__(self, tokens):
     self.tokens = tokens
     self.tok_idx = -1
+    self.func_depth = 0
+    self.saw_yield = False
+    self.record_field_offsets = {}
     self.advance()
 
   def advance(self):
@@ -831,6 +953,21 @@ class Parser:
         self.reverse(res.to_reverse_count)
       return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
     
+    if self.current_tok.matches(TT_KEYWORD, 'YIELD'):
+      if self.func_depth == 0:
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          "'YIELD' outside of a function"
+        ))
+
+      res.register_advancement()
+      self.advance()
+
+      expr = res.register(self.expr())
+      if res.error: return res
+      self.saw_yield = True
+      return res.success(YieldNode(expr, pos_start, self.current_tok.pos_start.copy()))
+
     if self.current_tok.matches(TT_KEYWORD, 'CONTINUE'):
       res.register_advancement()
       self.advance()
@@ -845,7 +982,7 @@ class Parser:
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected 'RETURN', 'CONTINUE', 'BREAK', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
+        "Expected 'RETURN', 'CONTINUE', 'BREAK', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[', '{' or 'NOT'"
       ))
     return res.success(expr)
 
@@ -883,9 +1020,21 @@ class Parser:
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
+        "Expected 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[', '{' or 'NOT'"
       ))
 
+    stage_nodes = []
+    while self.current_tok.type == TT_PIPE:
+      res.register_advancement()
+      self.advance()
+
+      stage = res.register(self.call())
+      if res.error: return res
+      stage_nodes.append(stage)
+
+    if stage_nodes:
+      node = PipeNode(node, stage_nodes)
+
     return res.success(node)
 
   def comp_expr(self):
@@ -905,7 +1054,7 @@ class Parser:
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected int, float, identifier, '+', '-', '(', '[', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'"
+        "Expected int, float, identifier, '+', '-', '(', '[', '{', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'"
       ))
 
     return res.success(node)
@@ -956,7 +1105,7 @@ class Parser:
         if res.error:
           return res.failure(InvalidSyntaxError(
             self.current_tok.pos_start, self.current_tok.pos_end,
-            "Expected ')', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
+            "Expected ')', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[', '{' or 'NOT'"
           ))
 
         while self.current_tok.type == TT_COMMA:
@@ -974,7 +1123,27 @@ class Parser:
 
         res.register_advancement()
         self.advance()
-      return res.success(CallNode(atom, arg_nodes))
+      atom = CallNode(atom, arg_nodes)
+
+    while self.current_tok.type == TT_DOT:
+      res.register_advancement()
+      self.advance()
+
+      if self.current_tok.type != TT_IDENTIFIER:
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          "Expected field name"
+        ))
+
+      field_name_tok = self.current_tok
+      res.register_advancement()
+      self.advance()
+
+      # Resolve the field to an offset now if every RECORD seen so far agrees on it
+      offsets = self.record_field_offsets.get(field_name_tok.value, ())
+      offset = next(iter(offsets)) if len(offsets) == 1 else None
+      atom = FieldAccessNode(atom, field_name_tok, offset)
+
     return res.success(atom)
 
   def atom(self):
@@ -1015,6 +1184,11 @@ class Parser:
       list_expr = res.register(self.list_expr())
       if res.error: return res
       return res.success(list_expr)
+
+    elif tok.type == TT_LBRACE:
+      dict_expr = res.register(self.dict_expr())
+      if res.error: return res
+      return res.success(dict_expr)
     
     elif tok.matches(TT_KEYWORD, 'IF'):
       if_expr = res.register(self.if_expr())
@@ -1036,9 +1210,14 @@ class Parser:
       if res.error: return res
       return res.success(func_def)
 
+    elif tok.matches(TT_KEYWORD, 'RECORD'):
+      record_def = res.register(self.record_def())
+      if res.error: return res
+      return res.success(record_def)
+
     return res.failure(InvalidSyntaxError(
       tok.pos_start, tok.pos_end,
-      "Expected int, float, identifier, '+', '-', '(', '[', IF', 'FOR', 'WHILE', 'FUN'"
+      "Expected int, float, identifier, '+', '-', '(', '[', '{', IF', 'FOR', 'WHILE', 'FUN', 'RECORD'"
     ))
 
   def list_expr(self):
@@ -1063,7 +1242,7 @@ class Parser:
       if res.error:
         return res.failure(InvalidSyntaxError(
           self.current_tok.pos_start, self.current_tok.pos_end,
-          "Expected ']', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
+          "Expected ']', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[', '{' or 'NOT'"
         ))
 
       while self.current_tok.type == TT_COMMA:
@@ -1088,6 +1267,64 @@ class Parser:
       self.current_tok.pos_end.copy()
     ))
 
+  def dict_expr(self):
+    res = ParseResult()
+    pair_nodes = []
+    pos_start = self.current_tok.pos_start.copy()
+
+    if self.current_tok.type != TT_LBRACE:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        f"Expected '{{'"
+      ))
+
+    res.register_advancement()
+    self.advance()
+
+    if self.current_tok.type == TT_RBRACE:
+      res.register_advancement()
+      self.advance()
+    else:
+      while True:
+        key = res.register(self.expr())
+        if res.error:
+          return res.failure(InvalidSyntaxError(
+            self.current_tok.pos_start, self.current_tok.pos_end,
+            "Expected '}', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[', '{' or 'NOT'"
+          ))
+
+        if self.current_tok.type != TT_COLON:
+          return res.failure(InvalidSyntaxError(
+            self.current_tok.pos_start, self.current_tok.pos_end,
+            f"Expected ':'"
+          ))
+
+        res.register_advancement()
+        self.advance()
+
+        value = res.register(self.expr())
+        if res.error: return res
+        pair_nodes.append((key, value))
+
+        if self.current_tok.type != TT_COMMA: break
+        res.register_advancement()
+        self.advance()
+
+      if self.current_tok.type != TT_RBRACE:
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          f"Expected ',' or '}}'"
+        ))
+
+      res.register_advancement()
+      self.advance()
+
+    return res.success(DictNode(
+      pair_nodes,
+      pos_start,
+      self.current_tok.pos_end.copy()
+    ))
+
   def if_expr(self):
     res = ParseResult()
     all_cases = res.register(self.if_expr_cases('IF'))
@@ -1219,10 +1456,49 @@ class Parser:
     res.register_advancement()
     self.advance()
 
+    if self.current_tok.matches(TT_KEYWORD, 'IN'):
+      res.register_advancement()
+      self.advance()
+
+      iterable = res.register(self.expr())
+      if res.error: return res
+
+      if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          f"Expected 'THEN'"
+        ))
+
+      res.register_advancement()
+      self.advance()
+
+      if self.current_tok.type == TT_NEWLINE:
+        res.register_advancement()
+        self.advance()
+
+        body = res.register(self.statements())
+        if res.error: return res
+
+        if not self.current_tok.matches(TT_KEYWORD, 'END'):
+          return res.failure(InvalidSyntaxError(
+            self.current_tok.pos_start, self.current_tok.pos_end,
+            f"Expected 'END'"
+          ))
+
+        res.register_advancement()
+        self.advance()
+
+        return res.success(ForInNode(var_name, iterable, body, True))
+
+      body = res.register(self.statement())
+      if res.error: return res
+
+      return res.success(ForInNode(var_name, iterable, body, False))
+
     if self.current_tok.type != TT_EQ:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        f"Expected '='"
+        f"Expected '=' or 'IN'"
       ))
     
     res.register_advancement()
@@ -1421,7 +1697,13 @@ class Parser:
     res.register_advancement()
     self.advance()
 
+    outer_saw_yield = self.saw_yield
+    self.saw_yield = False
+    self.func_depth += 1
     body = res.register(self.statements())
+    self.func_depth -= 1
+    is_generator = self.saw_yield
+    self.saw_yield = outer_saw_yield
     if res.error: return res
 
     if not self.current_tok.matches(TT_KEYWORD, 'END'):
@@ -1437,9 +1719,73 @@ class Parser:
       var_name_tok,
       arg_name_toks,
       body,
-      False
+      False,
+      is_generator
     ))
 
+  def record_def(self):
+    res = ParseResult()
+    pos_start = self.current_tok.pos_start.copy()
+
+    if not self.current_tok.matches(TT_KEYWORD, 'RECORD'):
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        f"Expected 'RECORD'"
+      ))
+
+    res.register_advancement()
+    self.advance()
+
+    if self.current_tok.type != TT_IDENTIFIER:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        f"Expected identifier"
+      ))
+
+    record_name_tok = self.current_tok
+    res.register_advancement()
+    self.advance()
+
+    if self.current_tok.type != TT_LPAREN:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        f"Expected '('"
+      ))
+
+    res.register_advancement()
+    self.advance()
+    field_name_toks = []
+
+    while self.current_tok.type == TT_IDENTIFIER:
+      if any(tok.value == self.current_tok.value for tok in field_name_toks):
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          f"Duplicate field '{self.current_tok.value}'"
+        ))
+
+      field_name_toks.append(self.current_tok)
+      res.register_advancement()
+      self.advance()
+
+      if self.current_tok.type != TT_COMMA: break
+      res.register_advancement()
+      self.advance()
+
+    if self.current_tok.type != TT_RPAREN:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        f"Expected identifier, ',' or ')'"
+      ))
+
+    pos_end = self.current_tok.pos_end.copy()
+    res.register_advancement()
+    self.advance()
+
+    for offset, tok in enumerate(field_name_toks):
+      self.record_field_offsets.setdefault(tok.value, set()).add(offset)
+
+    return res.success(RecordDefNode(record_name_tok, field_name_toks, pos_start, pos_end))
+
   ###################################
 
   def bin_op(self, func_a, ops, func_b=None):
@@ -1550,6 +1896,8 @@ class RuntimeResult:
 #################################################################################################
 
 class Value:
+  __slots__ = ('pos_start', 'pos_end', 'context')
+
   def __init__(self):
     self.set_pos()
     self.set_context()
@@ -1614,6 +1962,15 @@ class Value:
   def is_true(self):
     return False
 
+  def iterate(self):
+    # Iterable values return a Python iterator over their elements
+    return None
+
+  def hash_key(self):
+    # Values that can be used as Dict keys return a Python value that is
+    # equal (and hashes equal) exactly when the Yeep values are equal.
+    return None
+
   def illegal_operation(self, other=None):
     if not other: other = self
     return RTError(
@@ -1724,401 +2081,2836 @@ class Number(Value):
   def is_true(self):
     return self.value != 0
 
+  def hash_key(self):
+    return self.value
+
   def __str__(self):
     return str(self.value)
   
   def __repr__(self):
     return str(self.value)
 
-Number.null = Number(0)
-Number.false = Number(0)
-Number.true = Number(1)
-Number.math_PI = Number(math.pi)
+class Constant(Number):
+  """
+    A number shared by every program, such as NULL or TRUE. Setting its position or context
+    returns a copy instead, so the shared value never points into any one program's context.
+  """
+  def __init__(self, value):
+    self.value = value
+    self.pos_start = self.pos_end = self.context = None
+
+  def set_pos(self, pos_start=None, pos_end=None):
+    return self.copy().set_pos(pos_start, pos_end)
+
+  def set_context(self, context=None):
+    return self.copy().set_context(context)
+
+Number.null = Constant(0)
+Number.false = Constant(0)
+Number.true = Constant(1)
+Number.math_PI = Constant(math.pi)
 
 class String(Value):
+  """
+    Represents a string value.
+
+    Concatenation and repetition are deferred: the result keeps a reference to a shared list of
+    parts (a rope) and is only joined into a Python string the first time it is printed, compared
+    or indexed. Appending to the most recent string built from a rope reuses the same parts list,
+    so building a string in a loop is amortized O(1) per '+'.
+  """
   def __init__(self, value):
     super().__init__()
-    self.value = value
+    self._value = value
+    self._parts = None
+    self._part_count = 0
+    self._repeat = 1
+    self._length = len(value) if value is not None else 0
+
+  @classmethod
+  def from_parts(cls, parts, part_count, length, repeat=1):
+    string = cls(None)
+    string._parts = parts
+    string._part_count = part_count
+    string._repeat = repeat
+    string._length = length
+    return string
+
+  @property
+  def value(self):
+    if self._value is None:
+      self._value = self.flatten()
+      self._parts = None
+      self._part_count = 0
+      self._repeat = 1
+    return self._value
+
+  def flatten(self):
+    parts = self._parts
+    if len(parts) != self._part_count:
+      parts = parts[:self._part_count]
+    return ''.join(parts) * self._repeat
+
+  def length(self):
+    return self._length
+
+  def rope(self):
+    if self._value is not None or self._repeat != 1:
+      return [self.value], 1
+
+    parts = self._parts
+    if len(parts) != self._part_count:
+      parts = parts[:self._part_count]
+    return parts, len(parts)
 
   def added_to(self, other):
     if isinstance(other, String):
-      return String(self.value + other.value).set_context(self.context), None
+      parts, count = self.rope()
+      parts.append(other.value)
+      return String.from_parts(parts, count + 1, self._length + other._length).set_context(self.context), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def multed_by(self, other):
     if isinstance(other, Number):
-      return String(self.value * other.value).set_context(self.context), None
+      times = other.value
+      if not isinstance(times, int):
+        return None, Value.illegal_operation(self, other)
+      if times <= 1:
+        return String(self.value * times).set_context(self.context), None
+
+      parts, count = self.rope()
+      return String.from_parts(parts, count, self._length * times, times).set_context(self.context), None
     else:
       return None, Value.illegal_operation(self, other)
 
-  def is_true(self):
-    return len(self.value) > 0
-
-  def copy(self):
-    copy = String(self.value)
-    copy.set_pos(self.pos_start, self.pos_end)
-    copy.set_context(self.context)
-    return copy
-
-  def __str__(self):
-    return self.value
-
-  def __repr__(self):
-    return f'"{self.value}"'
-
-class List(Value):
-  def __init__(self, elements):
-    super().__init__()
-    self.elements = elements
-
-  def added_to(self, other):
-    new_list = self.copy()
-    new_list.elements.append(other)
-    return new_list, None
-
-  def subbed_by(self, other):
+  def dived_by(self, other):
     if isinstance(other, Number):
-      new_list = self.copy()
-      try:
-        new_list.elements.pop(other.value)
-        return new_list, None
-      except:
+      char = self.char_at(other.value)
+      if char is None:
         return None, RTError(
           other.pos_start, other.pos_end,
-          'Element at this index could not be removed from list because index is out of bounds',
+          'Character at this index could not be retrieved from string because index is out of bounds',
           self.context
         )
+      return String(char).set_context(self.context), None
     else:
       return None, Value.illegal_operation(self, other)
 
-  def multed_by(self, other):
-    if isinstance(other, List):
-      new_list = self.copy()
-      new_list.elements.extend(other.elements)
-      return new_list, None
+  def get_comparison_eq(self, other):
+    if isinstance(other, String):
+      return Number(int(self.equals(other))).set_context(self.context), None
     else:
       return None, Value.illegal_operation(self, other)
 
-  def dived_by(self, other):
-    if isinstance(other, Number):
-      try:
-        return self.elements[other.value], None
-      except:
-        return None, RTError(
-          other.pos_start, other.pos_end,
-          'Element at this index could not be retrieved from list because index is out of bounds',
-          self.context
-        )
+  def get_comparison_ne(self, other):
+    if isinstance(other, String):
+      return Number(int(not self.equals(other))).set_context(self.context), None
     else:
       return None, Value.illegal_operation(self, other)
-  
+
+  def get_comparison_lt(self, other):
+    if isinstance(other, String):
+      return Number(int(self.value < other.value)).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_gt(self, other):
+    if isinstance(other, String):
+      return Number(int(self.value > other.value)).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_lte(self, other):
+    if isinstance(other, String):
+      return Number(int(self.value <= other.value)).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_gte(self, other):
+    if isinstance(other, String):
+      return Number(int(self.value >= other.value)).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def equals(self, other):
+    if self._length != other._length: return False
+    if isinstance(other, StringView) and other._value is None:
+      return other.equals(self)
+    return self.value == other.value
+
+  def char_at(self, index):
+    if not isinstance(index, int): return None
+    if index < 0: index += self._length
+    if index < 0 or index >= self._length: return None
+    return self.value[index]
+
+  def slice(self, start, end):
+    start, end, _ = slice(start, end).indices(self._length)
+    if end <= start:
+      return String('')
+    if start == 0 and end == self._length:
+      return self.copy()
+    return StringView(self.value, start, end)
+
+  def is_true(self):
+    return self._length > 0
+
+  def hash_key(self):
+    return self.value
+
+  def iterate(self):
+    return map(String, self.value)
+
   def copy(self):
-    copy = List(self.elements)
+    if self._value is not None:
+      copy = String(self._value)
+    else:
+      copy = String.from_parts(self._parts, self._part_count, self._length, self._repeat)
     copy.set_pos(self.pos_start, self.pos_end)
     copy.set_context(self.context)
     return copy
 
   def __str__(self):
-    return ", ".join([str(x) for x in self.elements])
+    return self.value
 
   def __repr__(self):
-    return f'[{", ".join([repr(x) for x in self.elements])}]'
+    return f'"{self.value}"'
 
-class BaseFunction(Value):
+class StringView(String):
   """
-      Represents a base function in the programming language.
+    A zero-copy view of the characters base[start:end] of another string.
+
+    The characters are only copied when the view is concatenated, or when it is stored while
+    being much smaller than the string it points into, so it doesn't keep that string alive.
   """
-  def __init__(self, name):
-    super().__init__()
-    self.name = name or "<anonymous>"
+  COMPACT_FACTOR = 16
+
+  def __init__(self, base, start, end):
+    super().__init__(None)
+    self._base = base
+    self._start = start
+    self._end = end
+    self._length = end - start
+
+  def flatten(self):
+    value = self._base[self._start:self._end]
+    self._base = None
+    return value
 
-  def generate_new_context(self):
-    new_context = Context(self.name, self.context, self.pos_start)
-    new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
-    return new_context
+  def rope(self):
+    return [self.value], 1
+
+  def equals(self, other):
+    if self._length != other._length: return False
+    if self._value is not None: return self._value == other.value
+    return self._base.startswith(other.value, self._start, self._end)
+
+  def char_at(self, index):
+    if self._value is not None: return super().char_at(index)
+    if not isinstance(index, int): return None
+    if index < 0: index += self._length
+    if index < 0 or index >= self._length: return None
+    return self._base[self._start + index]
+
+  def slice(self, start, end):
+    if self._value is not None: return super().slice(start, end)
+    start, end, _ = slice(start, end).indices(self._length)
+    if end <= start:
+      return String('')
+    return StringView(self._base, self._start + start, self._start + end)
+
+  def iterate(self):
+    if self._value is not None: return super().iterate()
+    base = self._base
+    return (String(base[i]) for i in range(self._start, self._end))
+
+  def compact(self):
+    if self._value is None and self._length * self.COMPACT_FACTOR < len(self._base):
+      self.value
+    return self
 
-  def check_args(self, arg_names, args):
-    res = RuntimeResult()
+  def is_true(self):
+    return self._length > 0
 
-    if len(args) > len(arg_names):
-      return res.failure(RTError(
-        self.pos_start, self.pos_end,
-        f"{len(args) - len(arg_names)} too many args passed into {self}",
-        self.context
-      ))
-    
-    if len(args) < len(arg_names):
-      return res.failure(RTError(
-        self.pos_start, self.pos_end,
-        f"{len(arg_names) - len(args)} too few args passed into {self}",
-        self.context
-      ))
+  def copy(self):
+    if self._value is not None:
+      copy = String(self._value)
+    else:
+      copy = StringView(self._base, self._start, self._end)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
 
-    return res.success(None)
+class StringBuilder(Value):
+  """
+    A mutable string buffer with amortized O(1) APPEND.
+    Unlike List, + returns a new builder rather than appending to the buffer copies share.
+  """
+  def __init__(self, parts=None):
+    super().__init__()
+    self.parts = parts if parts is not None else []
 
-  def populate_args(self, arg_names, args, exec_ctx):
-    for i in range(len(args)):
-      arg_name = arg_names[i]
-      arg_value = args[i]
-      arg_value.set_context(exec_ctx)
-      exec_ctx.symbol_table.set(arg_name, arg_value)
+  def added_to(self, other):
+    return StringBuilder([self.build(), str(other)]).set_context(self.context), None
 
-  def check_and_populate_args(self, arg_names, args, exec_ctx):
-    res = RuntimeResult()
-    res.register(self.check_args(arg_names, args))
-    if res.should_return(): return res
-    self.populate_args(arg_names, args, exec_ctx)
-    return res.success(None)
+  def build(self):
+    if len(self.parts) > 1:
+      self.parts[:] = [''.join(self.parts)]
+    return self.parts[0] if self.parts else ''
 
-class Function(BaseFunction):
-  """
-      Represents a function in the programming language.
+  def is_true(self):
+    return any(self.parts)
 
-  """
-  def __init__(self, name, body_node, arg_names, should_auto_return):
-    super().__init__(name)
-    self.body_node = body_node
-    self.arg_names = arg_names
-    self.should_auto_return = should_auto_return
+  def copy(self):
+    copy = StringBuilder(self.parts)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
 
-  def execute(self, args):
-    res = RuntimeResult()
-    interpreter = Interpreter()
-    exec_ctx = self.generate_new_context()
+  def __str__(self):
+    return self.build()
 
-    res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-    if res.should_return(): return res
+  def __repr__(self):
+    return f'<string builder "{self.build()}">'
 
-    value = res.register(interpreter.visit(self.body_node, exec_ctx))
-    if res.should_return() and res.func_return_value == None: return res
+class List(Value):
+  def __init__(self, elements):
+    super().__init__()
+    self.elements = elements
 
-    ret_value = (value if self.should_auto_return else None) or res.func_return_value or Number.null
-    return res.success(ret_value)
+  def added_to(self, other):
+    new_list = self.copy()
+    new_list.elements.append(other)
+    return new_list, None
+
+  def subbed_by(self, other):
+    if isinstance(other, Number):
+      new_list = self.copy()
+      try:
+        new_list.elements.pop(other.value)
+        return new_list, None
+      except:
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Element at this index could not be removed from list because index is out of bounds',
+          self.context
+        )
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def multed_by(self, other):
+    if isinstance(other, List):
+      new_list = self.copy()
+      new_list.elements.extend(other.elements)
+      return new_list, None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def dived_by(self, other):
+    if isinstance(other, Number):
+      try:
+        return self.elements[other.value], None
+      except:
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Element at this index could not be retrieved from list because index is out of bounds',
+          self.context
+        )
+    else:
+      return None, Value.illegal_operation(self, other)
+  
+  def iterate(self):
+    return iter(self.elements)
 
   def copy(self):
-    copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return)
-    copy.set_context(self.context)
+    copy = List(self.elements)
     copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
     return copy
 
+  def __str__(self):
+    return ", ".join([str(x) for x in self.elements])
+
   def __repr__(self):
-    return f"<function {self.name}>"
+    return f'[{", ".join([repr(x) for x in self.elements])}]'
 
-class BuiltInFunction(BaseFunction):
+class Dict(Value):
   """
-      Represents a built-in function.
+    A hash map from Number or String keys to values, iterated in insertion order.
 
+    Attributes:
+        entries (dict): Maps each key's hash_key() to a (key, value) pair.
   """
-  def __init__(self, name):
-    super().__init__(name)
+  def __init__(self, entries=None):
+    super().__init__()
+    self.entries = entries if entries is not None else {}
 
-  def execute(self, args):
-    res = RuntimeResult()
-    exec_ctx = self.generate_new_context()
+  def get(self, key):
+    pair = self.entries.get(key.hash_key())
+    return pair[1] if pair else None
 
-    method_name = f'execute_{self.name}'
-    method = getattr(self, method_name, self.no_visit_method)
+  def set(self, key, value):
+    hash_key = key.hash_key()
+    pair = self.entries.get(hash_key)
+    self.entries[hash_key] = (pair[0] if pair else key, value)
 
-    res.register(self.check_and_populate_args(method.arg_names, args, exec_ctx))
-    if res.should_return(): return res
+  def has(self, key):
+    return key.hash_key() in self.entries
 
-    return_value = res.register(method(exec_ctx))
-    if res.should_return(): return res
-    return res.success(return_value)
-  
-  def no_visit_method(self, node, context):
-    raise Exception(f'No execute_{self.name} method defined')
+  def delete(self, key):
+    return self.entries.pop(key.hash_key(), None) is not None
+
+  def keys(self):
+    return [key for key, _ in self.entries.values()]
+
+  def values(self):
+    return [value for _, value in self.entries.values()]
+
+  def dived_by(self, other):
+    if other.hash_key() is None:
+      return None, RTError(
+        other.pos_start, other.pos_end,
+        'Dict keys must be numbers or strings',
+        self.context
+      )
+
+    value = self.get(other)
+    if value is None:
+      return None, RTError(
+        other.pos_start, other.pos_end,
+        f'Key {other!r} not found in dict',
+        self.context
+      )
+    return value, None
+
+  def iterate(self):
+    return iter(self.keys())
+
+  def is_true(self):
+    return len(self.entries) > 0
 
   def copy(self):
-    copy = BuiltInFunction(self.name)
-    copy.set_context(self.context)
+    copy = Dict(self.entries)
     copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
     return copy
 
-  def __repr__(self):
-    return f"<built-in function {self.name}>"
+  def __str__(self):
+    return self.__repr__()
 
-  #####################################
+  def __repr__(self):
+    return '{' + ", ".join([f'{key!r}: {value!r}' for key, value in self.entries.values()]) + '}'
 
-  def execute_print(self, exec_ctx):
-    print(str(exec_ctx.symbol_table.get('value')))
-    return RuntimeResult().success(Number.null)
-  execute_print.arg_names = ['value']
-  
-  def execute_print_ret(self, exec_ctx):
-    return RuntimeResult().success(String(str(exec_ctx.symbol_table.get('value'))))
-  execute_print_ret.arg_names = ['value']
-  
-  def execute_input(self, exec_ctx):
-    text = input()
-    return RuntimeResult().success(String(text))
-  execute_input.arg_names = []
+class Set(Value):
+  """
+    An unordered collection of distinct Number or String values, iterated in insertion order.
 
-  def execute_input_int(self, exec_ctx):
-    while True:
-      text = input()
-      try:
-        number = int(text)
-        break
-      except ValueError:
-        print(f"'{text}' must be an integer. Try again!")
-    return RuntimeResult().success(Number(number))
-  execute_input_int.arg_names = []
+    Attributes:
+        entries (dict): Maps each element's hash_key() to the element.
+  """
+  def __init__(self, entries=None):
+    super().__init__()
+    self.entries = entries if entries is not None else {}
 
-  def execute_clear(self, exec_ctx):
-    os.system('cls' if os.name == 'nt' else 'cls') 
-    return RuntimeResult().success(Number.null)
-  execute_clear.arg_names = []
+  def add(self, value):
+    self.entries.setdefault(value.hash_key(), value)
 
-  def execute_is_number(self, exec_ctx):
-    is_number = isinstance(exec_ctx.symbol_table.get("value"), Number)
-    return RuntimeResult().success(Number.true if is_number else Number.false)
-  execute_is_number.arg_names = ["value"]
+  def has(self, value):
+    return value.hash_key() in self.entries
 
-  def execute_is_string(self, exec_ctx):
-    is_number = isinstance(exec_ctx.symbol_table.get("value"), String)
-    return RuntimeResult().success(Number.true if is_number else Number.false)
-  execute_is_string.arg_names = ["value"]
+  def delete(self, value):
+    return self.entries.pop(value.hash_key(), None) is not None
 
-  def execute_is_list(self, exec_ctx):
-    is_number = isinstance(exec_ctx.symbol_table.get("value"), List)
-    return RuntimeResult().success(Number.true if is_number else Number.false)
-  execute_is_list.arg_names = ["value"]
+  def union(self, other):
+    entries = self.entries.copy()
+    entries.update({key: value for key, value in other.entries.items() if key not in entries})
+    return Set(entries)
 
-  def execute_is_function(self, exec_ctx):
-    is_number = isinstance(exec_ctx.symbol_table.get("value"), BaseFunction)
-    return RuntimeResult().success(Number.true if is_number else Number.false)
-  execute_is_function.arg_names = ["value"]
+  def intersection(self, other):
+    if len(self.entries) <= len(other.entries):
+      return Set({key: value for key, value in self.entries.items() if key in other.entries})
+    return Set({key: self.entries[key] for key in other.entries if key in self.entries})
 
-  def execute_append(self, exec_ctx):
-    list_ = exec_ctx.symbol_table.get("list")
-    value = exec_ctx.symbol_table.get("value")
+  def difference(self, other):
+    return Set({key: value for key, value in self.entries.items() if key not in other.entries})
 
-    if not isinstance(list_, List):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "First argument must be list",
-        exec_ctx
-      ))
+  def iterate(self):
+    return iter(list(self.entries.values()))
 
-    list_.elements.append(value)
-    return RuntimeResult().success(Number.null)
-  execute_append.arg_names = ["list", "value"]
+  def is_true(self):
+    return len(self.entries) > 0
 
-  def execute_pop(self, exec_ctx):
-    list_ = exec_ctx.symbol_table.get("list")
-    index = exec_ctx.symbol_table.get("index")
+  def copy(self):
+    copy = Set(self.entries)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
 
-    if not isinstance(list_, List):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "First argument must be list",
-        exec_ctx
-      ))
+  def __str__(self):
+    return ", ".join([str(x) for x in self.entries.values()])
 
-    if not isinstance(index, Number):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "Second argument must be number",
-        exec_ctx
-      ))
+  def __repr__(self):
+    return f'<set {{{", ".join([repr(x) for x in self.entries.values()])}}}>'
 
-    try:
-      element = list_.elements.pop(index.value)
-    except:
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        'Element at this index could not be removed from list because index is out of bounds',
-        exec_ctx
-      ))
-    return RuntimeResult().success(element)
-  execute_pop.arg_names = ["list", "index"]
+class Bytes(Value):
+  """
+    Binary data: the bytes buffer[start:end] of a bytes, bytearray or mmap object.
 
-  def execute_extend(self, exec_ctx):
-    listA = exec_ctx.symbol_table.get("listA")
-    listB = exec_ctx.symbol_table.get("listB")
+    Slices share the underlying buffer and only move the offsets, so cutting a large binary file
+    into records never copies it. view() exposes the bytes as a memoryview without copying.
+  """
+  def __init__(self, buffer, start=0, end=None):
+    super().__init__()
+    self.buffer = buffer
+    self.start = start
+    self.end = len(buffer) if end is None else end
 
-    if not isinstance(listA, List):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "First argument must be list",
-        exec_ctx
-      ))
+  def length(self):
+    return self.end - self.start
 
-    if not isinstance(listB, List):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "Second argument must be list",
-        exec_ctx
-      ))
+  def view(self):
+    return memoryview(self.buffer)[self.start:self.end]
 
-    listA.elements.extend(listB.elements)
-    return RuntimeResult().success(Number.null)
-  execute_extend.arg_names = ["listA", "listB"]
+  def to_bytes(self):
+    return bytes(self.view())
 
-  def execute_len(self, exec_ctx):
-    list_ = exec_ctx.symbol_table.get("list")
+  def slice(self, start, end):
+    start, end, _ = slice(start, end).indices(self.length())
+    if end < start: end = start
+    return Bytes(self.buffer, self.start + start, self.start + end)
 
-    if not isinstance(list_, List):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "Argument must be list",
-        exec_ctx
-      ))
+  def get_byte(self, index):
+    if not isinstance(index, int): return None
+    if index < 0: index += self.length()
+    if index < 0 or index >= self.length(): return None
+    return self.buffer[self.start + index]
 
-    return RuntimeResult().success(Number(len(list_.elements)))
-  execute_len.arg_names = ["list"]
+  def find(self, sub, start=0):
+    start, _, _ = slice(start, None).indices(self.length())
+    index = self.buffer.find(sub, self.start + start, self.end)
+    return index - self.start if index >= 0 else -1
 
-  def execute_run(self, exec_ctx):
-    fn = exec_ctx.symbol_table.get("fn")
+  def decode(self, encoding):
+    return str(self.view(), encoding)
 
-    if not isinstance(fn, String):
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        "Second argument must be string",
-        exec_ctx
-      ))
+  def added_to(self, other):
+    if isinstance(other, Bytes):
+      return Bytes(b''.join((self.view(), other.view()))).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
 
-    fn = fn.value
+  def dived_by(self, other):
+    if isinstance(other, Number):
+      byte = self.get_byte(other.value)
+      if byte is None:
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Byte at this index could not be retrieved because index is out of bounds',
+          self.context
+        )
+      return Number(byte).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_eq(self, other):
+    if isinstance(other, Bytes):
+      return Number(int(self.view() == other.view())).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_ne(self, other):
+    if isinstance(other, Bytes):
+      return Number(int(self.view() != other.view())).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def hash_key(self):
+    return self.to_bytes()
+
+  def iterate(self):
+    return map(Number, self.view())
+
+  def is_true(self):
+    return self.length() > 0
+
+  def copy(self):
+    copy = Bytes(self.buffer, self.start, self.end)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return self.__repr__()
+
+  def __repr__(self):
+    return repr(self.to_bytes())
+
+class Range(Value):
+  """
+    A lazy arithmetic sequence from start (inclusive) to end (exclusive), counting by step.
+    It follows the same bounds as FOR i = start TO end STEP step and never builds a list.
+  """
+  def __init__(self, start, end, step):
+    super().__init__()
+    self.start = start
+    self.end = end
+    self.step = step
+
+  def is_int(self):
+    return all(isinstance(x, int) for x in (self.start, self.end, self.step))
+
+  def length(self):
+    if self.is_int():
+      return len(range(self.start, self.end, self.step))
+
+    # The k-th element is start + k * step, so rounding in the division can't add an element at end
+    length = max(0, math.ceil((self.end - self.start) / self.step))
+    while length > 0 and not self.in_bounds(self.value_at(length - 1)):
+      length -= 1
+    return length
+
+  def in_bounds(self, value):
+    return value < self.end if self.step > 0 else value > self.end
+
+  def value_at(self, index):
+    return self.start + index * self.step
+
+  def iterate(self):
+    if self.is_int():
+      return map(Number, range(self.start, self.end, self.step))
+    return map(Number, map(self.value_at, range(self.length())))
+
+  def dived_by(self, other):
+    if isinstance(other, Number) and isinstance(other.value, int):
+      length = self.length()
+      index = other.value + length if other.value < 0 else other.value
+      if 0 <= index < length:
+        return Number(self.value_at(index)).set_context(self.context), None
+      return None, RTError(
+        other.pos_start, other.pos_end,
+        'Element at this index could not be retrieved from range because index is out of bounds',
+        self.context
+      )
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def is_true(self):
+    return self.length() > 0
+
+  def copy(self):
+    copy = Range(self.start, self.end, self.step)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return self.__repr__()
+
+  def __repr__(self):
+    return f'RANGE({self.start}, {self.end}, {self.step})'
+
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+# bz2 streams start with "BZh" and a block size digit, which keeps plain text starting with BZh out.
+COMPRESSION_MAGIC = (
+  (re.compile(rb'\x1f\x8b'), gzip.open),
+  (re.compile(rb'BZh[1-9]'), bz2.open),
+  (re.compile(rb'\xfd7zXZ\x00'), lzma.open),
+)
+
+def compression_opener(path, mode):
+  """
+    Returns gzip.open, bz2.open or lzma.open for a compressed file, or None for a plain one.
+    The extension decides; regular files being read are also recognized by their magic bytes.
+  """
+  opener = COMPRESSED_OPENERS.get(os.path.splitext(path)[1].lower())
+  if opener is not None or 'r' not in mode or not os.path.isfile(path):
+    return opener
+
+  with open(path, 'rb') as f:
+    magic = f.read(6)
+  for pattern, opener in COMPRESSION_MAGIC:
+    if pattern.match(magic): return opener
+  return None
+
+def open_file(path, mode='r', **kwargs):
+  """
+    Opens a file with a FILE_BUFFER_SIZE buffer, streaming it through the matching codec when it
+    is gzip, bz2 or xz compressed. Takes the same mode and text arguments as open().
+  """
+  opener = compression_opener(path, mode)
+  if opener is None:
+    return open(path, mode, buffering=FILE_BUFFER_SIZE, **kwargs)
+
+  stream = opener(path, mode.replace('t', '').replace('b', '') + 'b')
+  if 'r' in mode:
+    stream = io.BufferedReader(stream, FILE_BUFFER_SIZE)
+  else:
+    stream = io.BufferedWriter(stream, FILE_BUFFER_SIZE)
+  return stream if 'b' in mode else io.TextIOWrapper(stream, **kwargs)
+
+class FileLines(Value):
+  """
+    The lines of a text file, read lazily through a large buffer without their line endings.
+    The file is opened each time the value is iterated and closed when the iteration finishes.
+  """
+  def __init__(self, path):
+    super().__init__()
+    self.path = path
+
+  def iterate(self):
+    return self.checked(self.lines())
+
+  def checked(self, elements):
+    try:
+      yield from elements
+    except FILE_ERRORS as e:
+      raise IterationError(self.error(f"Failed to read file \"{self.path}\"\n" + str(e)))
+
+  def error(self, details):
+    return RTError(self.pos_start, self.pos_end, details, self.context)
+
+  def lines(self):
+    with open_file(self.path) as f:
+      for line in f:
+        yield String(line[:-1] if line.endswith('\n') else line)
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = FileLines(self.path)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<lines "{self.path}">'
+
+class CsvRows(FileLines):
+  """
+    The rows of a CSV file, read lazily as Lists, or as Dicts keyed by the first row if header is set.
+
+    Rows are read in batches of ROW_BATCH_SIZE and converted a column at a time, so a column of
+    numbers is validated and parsed in bulk. A cell's type never depends on the rest of its batch.
+  """
+  def __init__(self, path, header=False):
+    super().__init__(path)
+    self.header = header
+
+  def iterate(self):
+    return self.checked(self.rows())
+
+  def rows(self):
+    with open_file(self.path, newline='') as f:
+      reader = csv.reader(f)
+      fields = None
+
+      if self.header:
+        fields = next(reader, None)
+        if fields is None: return
+        fields = [(field, String(field)) for field in fields]
+
+      while True:
+        batch = [row for _, row in zip(range(ROW_BATCH_SIZE), reader)]
+        if not batch: return
+
+        for row in convert_csv_batch(batch):
+          if fields is None:
+            yield List(row)
+          else:
+            yield Dict({field: (key, value) for (field, key), value in zip(fields, row)})
+
+  def copy(self):
+    copy = CsvRows(self.path, self.header)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<csv rows "{self.path}">'
+
+class JsonlRows(FileLines):
+  """
+    The values of a JSON lines file, one per non-blank line, read lazily.
+  """
+  def iterate(self):
+    return self.checked(self.rows())
+
+  def rows(self):
+    decode = json.loads
+    with open_file(self.path) as f:
+      for line_number, line in enumerate(f, 1):
+        if line.isspace(): continue
+        try:
+          value = decode(line)
+        except ValueError as e:
+          raise IterationError(self.error(f"Invalid JSON on line {line_number} of \"{self.path}\"\n" + str(e)))
+        yield to_yeep(value)
+
+  def copy(self):
+    copy = JsonlRows(self.path)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<jsonl rows "{self.path}">'
+
+# Plain decimal literals only: int() and float() would also take nan, inf, 1_000 and 007.
+DECIMAL_NUMBER = re.compile(r'\s*[+-]?((0|[1-9]\d*)(\.\d*)?|\.\d+)([eE][+-]?\d+)?\s*')
+
+def convert_number(text):
+  """
+    Parses text as an integer, or failing that as a float. Raises ValueError if it is neither.
+  """
+  if not DECIMAL_NUMBER.fullmatch(text):
+    raise ValueError(f"'{text}' is not a decimal number")
+  try:
+    return Number(int(text))
+  except ValueError:
+    return Number(float(text))
+
+def convert_cell(cell):
+  try:
+    return convert_number(cell)
+  except ValueError:
+    return String(cell)
+
+def convert_cells(cells):
+  """
+    Converts a column of CSV cells. A column of plain integers is parsed with a single int() pass;
+    otherwise every cell gets the same type convert_cell would give it on its own.
+  """
+  if not all(map(DECIMAL_NUMBER.fullmatch, cells)):
+    return list(map(convert_cell, cells))
+  try:
+    return list(map(Number, map(int, cells)))
+  except ValueError:
+    return list(map(convert_number, cells))
+
+def convert_csv_batch(rows):
+  width = len(rows[0])
+  if any(len(row) != width for row in rows):
+    return [list(map(convert_cell, row)) for row in rows]
+  return zip(*[convert_cells(column) for column in zip(*rows)])
+
+def to_yeep(value):
+  """
+    Converts a Python value made of None, bools, numbers, strings, lists and dicts to a Yeep value.
+  """
+  if isinstance(value, str):
+    return String(value)
+  if isinstance(value, bool):
+    return Number.true if value else Number.false
+  if isinstance(value, (int, float)):
+    return Number(value)
+  if isinstance(value, (list, tuple)):
+    return List([to_yeep(element) for element in value])
+  if isinstance(value, dict):
+    entries = {}
+    for key, element in value.items():
+      key = to_yeep(key)
+      entries[key.hash_key()] = (key, to_yeep(element))
+    return Dict(entries)
+  if value is None:
+    return Number.null
+  raise ValueError(f"Python value of type {type(value).__name__} cannot be converted")
+
+def to_python(value):
+  """
+    Converts a Yeep value to plain Python numbers, strings, lists and dicts.
+    Sets, ranges and other iterables become lists, records become dicts of their fields.
+  """
+  if isinstance(value, (Number, String)):
+    return value.value
+  if isinstance(value, List):
+    return [to_python(element) for element in value.elements]
+  if isinstance(value, Dict):
+    return {to_python(key): to_python(element) for key, element in value.entries.values()}
+  if isinstance(value, Record):
+    return {name: to_python(element) for name, element in zip(value.layout.fields, value.values)}
+
+  iterator = value.iterate()
+  if iterator is None:
+    raise ValueError(f"{value!r} cannot be converted")
+  return [to_python(element) for element in iterator]
+
+def csv_cell(value):
+  return value.value if isinstance(value, (Number, String)) else str(value)
+
+def write_csv_rows(f, rows):
+  """
+    Writes Lists as CSV rows. Dict rows are written under a header taken from the first row's keys.
+  """
+  writer = csv.writer(f)
+  fields = None
+  for row in rows:
+    if isinstance(row, List):
+      writer.writerow([csv_cell(element) for element in row.elements])
+    elif isinstance(row, Dict):
+      if fields is None:
+        fields = row.keys()
+        writer.writerow([csv_cell(field) for field in fields])
+      writer.writerow([csv_cell(row.get(field) or String('')) for field in fields])
+    else:
+      raise ValueError("Rows must be lists or dicts")
+
+def write_jsonl_rows(f, rows):
+  encode = json.JSONEncoder(ensure_ascii=False).encode
+  f.writelines(encode(to_python(row)) + "\n" for row in rows)
+
+class RegexCache:
+  """
+    A bounded LRU cache of compiled regular expressions keyed by pattern and flags, so a pattern
+    used inside a loop is compiled once. Hits and misses are counted for tuning max_size.
+    The cache is shared by every engine, so it is guarded by a lock.
+  """
+  FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+
+  def __init__(self, max_size=128):
+    self.max_size = max_size
+    self.patterns = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.lock = threading.Lock()
+
+  def compile(self, pattern, flags=''):
+    """
+      Returns the compiled pattern. Raises re.error for a bad pattern and ValueError for unknown flags.
+    """
+    key = (pattern, flags)
+    with self.lock:
+      compiled = self.patterns.get(key)
+      if compiled is not None:
+        self.hits += 1
+        self.patterns.move_to_end(key)
+        return compiled
+      self.misses += 1
+
+    value = 0
+    for flag in flags:
+      if flag not in self.FLAGS:
+        raise ValueError(f"Unknown regular expression flag '{flag}'")
+      value |= self.FLAGS[flag]
+
+    compiled = re.compile(pattern, value)
+    with self.lock:
+      self.patterns[key] = compiled
+      if len(self.patterns) > self.max_size:
+        self.patterns.popitem(last=False)
+    return compiled
+
+  def stats(self):
+    with self.lock:
+      return {'hits': self.hits, 'misses': self.misses, 'size': len(self.patterns), 'max_size': self.max_size}
+
+regex_cache = RegexCache()
+
+def comparison_key(value):
+  """
+    Returns the Python value that orders the same way as the Yeep comparison operators,
+    or None if the value has no ordering.
+  """
+  if isinstance(value, (Number, String)):
+    return value.value
+  return None
+
+class ComparisonKeys:
+  """
+    A read-only sequence view of comparison_key() over a list of values, so bisect can probe a
+    sorted List by its Python keys without building a separate key list.
+  """
+  def __init__(self, elements):
+    self.elements = elements
+
+  def __len__(self):
+    return len(self.elements)
+
+  def __getitem__(self, index):
+    return comparison_key(self.elements[index])
+
+class Deque(Value):
+  """
+    A double-ended queue backed by collections.deque, with O(1) pushes and pops at both ends.
+  """
+  def __init__(self, elements=None):
+    super().__init__()
+    self.elements = elements if elements is not None else deque()
+
+  def iterate(self):
+    # A deque can't be iterated while it changes, and the loop body may push or pop
+    return iter(list(self.elements))
+
+  def dived_by(self, other):
+    if isinstance(other, Number):
+      try:
+        return self.elements[other.value], None
+      except:
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Element at this index could not be retrieved from deque because index is out of bounds',
+          self.context
+        )
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def is_true(self):
+    return len(self.elements) > 0
+
+  def copy(self):
+    copy = Deque(self.elements)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([str(x) for x in self.elements])
+
+  def __repr__(self):
+    return f'<deque [{", ".join([repr(x) for x in self.elements])}]>'
+
+class Heap(Value):
+  """
+    A binary min-heap backed by heapq, ordered like the Yeep '<' operator on its Numbers or Strings.
+    An element can also be a [priority, value] List, which is ordered by its first element only,
+    as it was when pushed.
+
+    Attributes:
+        entries (list): heapq entries of (key, sequence, value); the sequence number keeps pops of
+            equal keys in insertion order and stops heapq from ever comparing two Values.
+  """
+  def __init__(self, entries=None, counter=None):
+    super().__init__()
+    self.entries = entries if entries is not None else []
+    self.counter = counter if counter is not None else count()
+
+  def key_for(self, value):
+    if isinstance(value, List) and value.elements:
+      value = value.elements[0]
+    key = comparison_key(value)
+    if key is None: return None
+    # Numbers and strings have no order between them, so a heap holds only one kind
+    if self.entries and isinstance(self.entries[0][0], str) != isinstance(key, str):
+      return None
+    return key
+
+  def push(self, value):
+    key = self.key_for(value)
+    if key is None: return False
+    heapq.heappush(self.entries, (key, next(self.counter), value))
+    return True
+
+  def pop(self):
+    return heapq.heappop(self.entries)[2]
+
+  def peek(self):
+    return self.entries[0][2]
+
+  def iterate(self):
+    # Iterate in priority order without disturbing the heap
+    return iter([value for _, _, value in sorted(self.entries)])
+
+  def is_true(self):
+    return len(self.entries) > 0
+
+  def copy(self):
+    copy = Heap(self.entries, self.counter)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([str(x) for x in self.iterate()])
+
+  def __repr__(self):
+    return f'<heap [{", ".join([repr(x) for x in self.iterate()])}]>'
+
+class Pipeline(Value):
+  """
+    A lazy plan of MAP, FILTER and TAKE stages over an iterable source, built by the '|>' operator.
+
+    Iterating it runs every stage in a single fused loop: each source element flows through all
+    stages before the next one is pulled, and the source is not read past the last element a TAKE
+    stage lets through. Nothing is materialized, so memory use does not grow with the chain.
+
+    Attributes:
+        source (Value): The iterable the elements are read from.
+        stages (list): (name, argument) pairs, where name is 'MAP', 'FILTER' or 'TAKE'.
+  """
+  STAGE_NAMES = ('MAP', 'FILTER', 'TAKE')
+
+  def __init__(self, source, stages=None):
+    super().__init__()
+    self.source = source
+    self.stages = stages or []
+
+  def with_stage(self, name, argument):
+    return Pipeline(self.source, self.stages + [(name, argument)])
+
+  def iterate(self):
+    return self.elements()
+
+  def elements(self):
+    stages = self.stages
+    taken = [0] * len(stages)
+
+    for name, argument in stages:
+      if name == 'TAKE' and argument <= 0: return
+
+    for item in self.source.iterate():
+      done = False
+
+      for index, (name, argument) in enumerate(stages):
+        if name == 'MAP':
+          item = self.call(argument, item)
+        elif name == 'FILTER':
+          if not self.call(argument, item).is_true(): break
+        else:
+          taken[index] += 1
+          if taken[index] >= argument: done = True
+      else:
+        yield item
+
+      if done: return
+
+  def call(self, func, item):
+    res = func.execute([item])
+    if res.error: raise IterationError(res.error)
+    return res.value
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = Pipeline(self.source, self.stages)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<pipeline {" |> ".join([name for name, _ in self.stages])}>'
+
+class BaseFunction(Value):
+  """
+      Represents a base function in the programming language.
+  """
+  def __init__(self, name):
+    super().__init__()
+    self.name = name or "<anonymous>"
+
+  def generate_new_context(self):
+    new_context = Context(self.name, self.context, self.pos_start)
+    new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    return new_context
+
+  def check_args(self, arg_names, args):
+    res = RuntimeResult()
+
+    if len(args) > len(arg_names):
+      return res.failure(RTError(
+        self.pos_start, self.pos_end,
+        f"{len(args) - len(arg_names)} too many args passed into {self}",
+        self.context
+      ))
+    
+    if len(args) < len(arg_names):
+      return res.failure(RTError(
+        self.pos_start, self.pos_end,
+        f"{len(arg_names) - len(args)} too few args passed into {self}",
+        self.context
+      ))
+
+    return res.success(None)
+
+  def populate_args(self, arg_names, args, exec_ctx):
+    for i in range(len(args)):
+      arg_name = arg_names[i]
+      arg_value = args[i]
+      arg_value.set_context(exec_ctx)
+      exec_ctx.symbol_table.set(arg_name, arg_value)
+
+  def check_and_populate_args(self, arg_names, args, exec_ctx):
+    res = RuntimeResult()
+    res.register(self.check_args(arg_names, args))
+    if res.should_return(): return res
+    self.populate_args(arg_names, args, exec_ctx)
+    return res.success(None)
+
+class Function(BaseFunction):
+  """
+      Represents a function in the programming language.
+
+  """
+  def __init__(self, name, body_node, arg_names, should_auto_return, is_generator=False):
+    super().__init__(name)
+    self.body_node = body_node
+    self.arg_names = arg_names
+    self.should_auto_return = should_auto_return
+    self.is_generator = is_generator
+
+  def execute(self, args):
+    res = RuntimeResult()
+    interpreter = Interpreter()
+    exec_ctx = self.generate_new_context()
+
+    res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
+    if res.should_return(): return res
+
+    if self.is_generator:
+      return res.success(Generator(GeneratorFrame(self, exec_ctx)))
+
+    value = res.register(interpreter.visit(self.body_node, exec_ctx))
+    if res.should_return() and res.func_return_value == None: return res
+
+    ret_value = (value if self.should_auto_return else None) or res.func_return_value or Number.null
+    return res.success(ret_value)
+
+  def copy(self):
+    copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return, self.is_generator)
+    copy.set_context(self.context)
+    copy.set_pos(self.pos_start, self.pos_end)
+    return copy
+
+  def __repr__(self):
+    return f"<function {self.name}>"
+
+class IterationError(Exception):
+  """
+    Raised by a value's iterator when producing the next element failed.
+
+    Attributes:
+        error (RTError): The runtime error to report to whoever is consuming the iterator.
+  """
+  def __init__(self, error):
+    super().__init__(error.details)
+    self.error = error
+
+class GeneratorFrame:
+  """
+    The suspended execution of a generator function's body.
+
+    The body runs on its own thread so that it can be paused in the middle of the tree walk at
+    each YIELD. Control is handed back and forth with a pair of semaphores, so the body and its
+    consumer never run at the same time and each element is produced only when it is asked for.
+  """
+  def __init__(self, function, exec_ctx):
+    self.function = function
+    self.exec_ctx = exec_ctx
+    self.exec_ctx.generator = self
+    self.thread = None
+    self.resumed = threading.Semaphore(0)
+    self.yielded = threading.Semaphore(0)
+    self.item = None
+    self.error = None
+    self.exception = None
+    self.running = False
+    self.finished = False
+    self.closed = False
+
+  def next(self):
+    """
+        Runs the body up to its next YIELD.
+
+        Returns:
+            Value or None: The yielded value, or None once the body has finished.
+    """
+    if self.finished: return None
+
+    # Waiting on a body that is itself waiting for this element would never return
+    if self.running:
+      raise IterationError(RTError(
+        self.function.pos_start, self.function.pos_end,
+        f"Generator {self.function.name} is already executing",
+        self.exec_ctx
+      ))
+
+    self.running = True
+    if self.thread is None:
+      self.thread = threading.Thread(target=self.run_body, daemon=True)
+      self.thread.start()
+    else:
+      self.resumed.release()
+
+    self.yielded.acquire()
+    self.running = False
+    if self.finished:
+      if self.exception:
+        exception, self.exception = self.exception, None
+        raise exception
+      if self.error: raise IterationError(self.error)
+      return None
+    return self.item
+
+  def run_body(self):
+    # An exception would otherwise end the thread without waking the consumer, so it is
+    # handed over and raised again on the consumer's side.
+    try:
+      res = Interpreter().visit(self.function.body_node, self.exec_ctx)
+      self.error = res.error
+    except Exception as e:
+      self.exception = e
+    finally:
+      self.finished = True
+      self.yielded.release()
+
+  def yield_value(self, value):
+    """
+        Hands a value to the consumer and waits until the next one is requested.
+
+        Returns:
+            bool: False if the generator was closed in the meantime and the body should stop.
+    """
+    self.item = value
+    self.yielded.release()
+    self.resumed.acquire()
+    return not self.closed
+
+  def close(self):
+    if self.thread is not None and not self.finished:
+      self.closed = True
+      self.resumed.release()
+
+  def elements(self):
+    while True:
+      item = self.next()
+      if item is None: return
+      yield item
+
+class GeneratorHandle:
+  """
+    Owns a GeneratorFrame on behalf of every copy of a Generator value and closes it once they
+    are all gone, so an abandoned generator's thread can finish.
+  """
+  def __init__(self, frame):
+    self.frame = frame
+
+  def __del__(self):
+    self.frame.close()
+
+class Generator(Value):
+  """
+    The lazy iterator returned by calling a function that contains YIELD.
+    Copies share the same frame, so iteration continues where the last loop stopped.
+  """
+  def __init__(self, handle):
+    super().__init__()
+    self.handle = handle if isinstance(handle, GeneratorHandle) else GeneratorHandle(handle)
+
+  def iterate(self):
+    return self.handle.frame.elements()
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = Generator(self.handle)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f"<generator {self.handle.frame.function.name}>"
+
+class RecordLayout:
+  """
+    The field layout shared by a RECORD type and every record built from it.
+    Two records are only equal if they were built from the same layout.
+  """
+  __slots__ = ('name', 'fields', 'index')
+
+  def __init__(self, name, fields):
+    self.name = name
+    self.fields = fields
+    self.index = {field: offset for offset, field in enumerate(fields)}
+
+class Record(Value):
+  """
+    An immutable, fixed-layout value with named fields, stored as a tuple.
+  """
+  __slots__ = ('layout', 'values')
+
+  def __init__(self, layout, values):
+    super().__init__()
+    self.layout = layout
+    self.values = values
+
+  def field(self, name, offset=None):
+    if offset is not None and offset < len(self.values) and self.layout.fields[offset] == name:
+      return self.values[offset]
+    offset = self.layout.index.get(name)
+    return None if offset is None else self.values[offset]
+
+  def get_comparison_eq(self, other):
+    if isinstance(other, Record):
+      return Number(int(self.equals(other))).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def get_comparison_ne(self, other):
+    if isinstance(other, Record):
+      return Number(int(not self.equals(other))).set_context(self.context), None
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def equals(self, other):
+    if self.layout is not other.layout: return False
+    for a, b in zip(self.values, other.values):
+      if a is b: continue
+      key = a.hash_key()
+      if key is None or key != b.hash_key(): return False
+    return True
+
+  def hash_key(self):
+    keys = tuple(value.hash_key() for value in self.values)
+    if None in keys: return None
+    return (self.layout, keys)
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = Record(self.layout, self.values)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return self.__repr__()
+
+  def __repr__(self):
+    fields = ", ".join([f'{name}={value!r}' for name, value in zip(self.layout.fields, self.values)])
+    return f'{self.layout.name}({fields})'
+
+class RecordType(BaseFunction):
+  """
+    The constructor declared by RECORD Name(field, ...); calling it builds a Record.
+  """
+  def __init__(self, layout):
+    super().__init__(layout.name)
+    self.layout = layout
+
+  def execute(self, args):
+    res = RuntimeResult()
+    res.register(self.check_args(self.layout.fields, args))
+    if res.should_return(): return res
+    return res.success(Record(self.layout, tuple(args)))
+
+  def copy(self):
+    copy = RecordType(self.layout)
+    copy.set_context(self.context)
+    copy.set_pos(self.pos_start, self.pos_end)
+    return copy
+
+  def __repr__(self):
+    return f"<record {self.layout.name}({', '.join(self.layout.fields)})>"
+
+class BuiltInFunction(BaseFunction):
+  """
+      Represents a built-in function.
+
+      The implementation is a Python function registered with @builtin. It is called directly
+      as func(fn, *args), where fn is this function value, so a call does not allocate a Context
+      or SymbolTable. Optional arguments that were left out are not passed, so the
+      implementation's defaults apply.
+  """
+  def __init__(self, name, func, arity, optional=0):
+    super().__init__(name)
+    self.func = func
+    self.arity = arity
+    self.optional = optional
+
+  def execute(self, args):
+    if len(args) > self.arity + self.optional:
+      return RuntimeResult().failure(RTError(
+        self.pos_start, self.pos_end,
+        f"{len(args) - self.arity - self.optional} too many args passed into {self}",
+        self.context
+      ))
+
+    if len(args) < self.arity:
+      return RuntimeResult().failure(RTError(
+        self.pos_start, self.pos_end,
+        f"{self.arity - len(args)} too few args passed into {self}",
+        self.context
+      ))
+
+    return self.func(self, *args)
+
+  def error(self, details):
+    """
+        Returns a runtime error raised inside this built-in. The built-in's own frame for the
+        traceback is only created here, when a call actually fails.
+    """
+    return RTError(self.pos_start, self.pos_end, details, Context(self.name, self.context, self.pos_start))
+
+  def copy(self):
+    copy = BuiltInFunction(self.name, self.func, self.arity, self.optional)
+    copy.set_context(self.context)
+    copy.set_pos(self.pos_start, self.pos_end)
+    return copy
+
+  def __repr__(self):
+    return f"<built-in function {self.name}>"
+
+BUILTINS = {}
+
+def builtin(name, arity, optional=0):
+  """
+    Registers the decorated Python function as the built-in called name in every program.
+
+    The function receives the BuiltInFunction value being called followed by the arity positional
+    arguments and up to optional more, and returns a RuntimeResult. Errors are built with
+    fn.error(details). Embedders can register their own built-ins the same way.
+  """
+  def register(func):
+    BUILTINS[name] = BuiltInFunction(name.lower(), func, arity, optional)
+    return func
+  return register
+
+@builtin("PRINT", 1)
+def builtin_print(fn, value):
+  fn.context.output.write(str(value) + '\n')
+  return RuntimeResult().success(Number.null)
+
+@builtin("PRINT_RET", 1)
+def builtin_print_ret(fn, value):
+  return RuntimeResult().success(String(str(value)))
+
+def read_input_line(fn):
+  fn.context.output.flush()
+  text = fn.context.input.read_line()
+  if text is None:
+    return None, fn.error("Unexpected end of input")
+  return text, None
+
+@builtin("INPUT", 0)
+def builtin_input(fn):
+  text, error = read_input_line(fn)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(String(text))
+
+@builtin("INPUT_INT", 0)
+def builtin_input_int(fn):
+  while True:
+    text, error = read_input_line(fn)
+    if error: return RuntimeResult().failure(error)
+    try:
+      number = int(text)
+      break
+    except ValueError:
+      if fn.context.input.strict:
+        return RuntimeResult().failure(fn.error(f"'{text}' must be an integer"))
+      fn.context.output.write(f"'{text}' must be an integer. Try again!\n")
+  return RuntimeResult().success(Number(number))
+
+@builtin("READ_ALL_INPUT", 0)
+def builtin_read_all_input(fn):
+  fn.context.output.flush()
+  return RuntimeResult().success(String(fn.context.input.read_all()))
+
+@builtin("INPUT_LINES", 0)
+def builtin_input_lines(fn):
+  fn.context.output.flush()
+  return RuntimeResult().success(InputLines(fn.context.input))
+
+@builtin("INPUT_NUMBERS", 0)
+def builtin_input_numbers(fn):
+  fn.context.output.flush()
+  try:
+    numbers = fn.context.input.numbers()
+  except ValueError as e:
+    return RuntimeResult().failure(fn.error(str(e)))
+  return RuntimeResult().success(List(numbers))
+
+@builtin("FLUSH", 0)
+def builtin_flush(fn):
+  fn.context.output.flush()
+  return RuntimeResult().success(Number.null)
+
+@builtin("CLEAR", 0)
+def builtin_clear(fn):
+  os.system('cls' if os.name == 'nt' else 'cls') 
+  return RuntimeResult().success(Number.null)
+
+BUILTINS["CLS"] = BUILTINS["CLEAR"]
+
+@builtin("IS_NUM", 1)
+def builtin_is_number(fn, value):
+  is_number = isinstance(value, Number)
+  return RuntimeResult().success(Number.true if is_number else Number.false)
+
+@builtin("IS_STR", 1)
+def builtin_is_string(fn, value):
+  is_number = isinstance(value, String)
+  return RuntimeResult().success(Number.true if is_number else Number.false)
+
+@builtin("IS_LIST", 1)
+def builtin_is_list(fn, value):
+  is_number = isinstance(value, List)
+  return RuntimeResult().success(Number.true if is_number else Number.false)
+
+@builtin("IS_FUN", 1)
+def builtin_is_function(fn, value):
+  is_number = isinstance(value, BaseFunction)
+  return RuntimeResult().success(Number.true if is_number else Number.false)
+
+@builtin("IS_DICT", 1)
+def builtin_is_dict(fn, value):
+  is_dict = isinstance(value, Dict)
+  return RuntimeResult().success(Number.true if is_dict else Number.false)
+
+@builtin("IS_SET", 1)
+def builtin_is_set(fn, value):
+  is_set = isinstance(value, Set)
+  return RuntimeResult().success(Number.true if is_set else Number.false)
+
+@builtin("APPEND", 2)
+def builtin_append(fn, list_, value):
+  if isinstance(list_, StringBuilder):
+    list_.parts.append(str(value))
+    return RuntimeResult().success(Number.null)
+
+  if not isinstance(list_, List):
+    return RuntimeResult().failure(fn.error("First argument must be list"))
+
+  if isinstance(value, StringView): value.compact()
+  list_.elements.append(value)
+  return RuntimeResult().success(Number.null)
+
+@builtin("POP", 2)
+def builtin_pop(fn, list_, index):
+  if not isinstance(list_, List):
+    return RuntimeResult().failure(fn.error("First argument must be list"))
+
+  if not isinstance(index, Number):
+    return RuntimeResult().failure(fn.error("Second argument must be number"))
+
+  try:
+    element = list_.elements.pop(index.value)
+  except:
+    return RuntimeResult().failure(fn.error('Element at this index could not be removed from list because index is out of bounds'))
+  return RuntimeResult().success(element)
+
+@builtin("EXTEND", 2)
+def builtin_extend(fn, listA, listB):
+  if not isinstance(listA, List):
+    return RuntimeResult().failure(fn.error("First argument must be list"))
+
+  if not isinstance(listB, List):
+    return RuntimeResult().failure(fn.error("Second argument must be list"))
+
+  listA.elements.extend(listB.elements)
+  return RuntimeResult().success(Number.null)
+
+@builtin("LEN", 1)
+def builtin_len(fn, list_):
+  if isinstance(list_, (Dict, Set)):
+    return RuntimeResult().success(Number(len(list_.entries)))
+
+  if isinstance(list_, Range):
+    return RuntimeResult().success(Number(list_.length()))
+
+  if isinstance(list_, Deque):
+    return RuntimeResult().success(Number(len(list_.elements)))
+
+  if isinstance(list_, Heap):
+    return RuntimeResult().success(Number(len(list_.entries)))
+
+  if isinstance(list_, (Bytes, String, PythonSequence)):
+    return RuntimeResult().success(Number(list_.length()))
+
+  if not isinstance(list_, List):
+    return RuntimeResult().failure(fn.error("Argument must be list, string, dict, set, range, deque, heap or bytes"))
+
+  return RuntimeResult().success(Number(len(list_.elements)))
+
+@builtin("RUN", 1)
+def builtin_run(fn, path):
+  if not isinstance(path, String):
+    return RuntimeResult().failure(fn.error("Second argument must be string"))
+
+  path = path.value
+
+  try:
+    with open_file(path) as f:
+      script = f.read()
+  except Exception as e:
+    return RuntimeResult().failure(fn.error(f"Failed to load script \"{path}\"\n" + str(e)))
+
+  # The script runs in the global scope of the program calling RUN, which may be an engine's.
+  root = fn.context
+  while root.parent:
+    root = root.parent
+
+  program, error = compile(path, script)
+  if not error:
+    _, error = program.execute(
+      root.symbol_table, None, fn.context.output,
+      input_source=fn.context.input, vectorizer=fn.context.vectorizer
+    )
+  
+  if error:
+    return RuntimeResult().failure(fn.error(f"Failed to finish executing script \"{path}\"\n" + error.as_string()))
+
+  return RuntimeResult().success(Number.null)
+
+@builtin("STRING_BUILDER", 0)
+def builtin_string_builder(fn):
+  return RuntimeResult().success(StringBuilder())
+
+@builtin("BUILD", 1)
+def builtin_build(fn, builder):
+  if not isinstance(builder, StringBuilder):
+    return RuntimeResult().failure(fn.error("Argument must be string builder"))
+
+  return RuntimeResult().success(String(builder.build()))
+
+@builtin("SLICE", 3)
+def builtin_slice(fn, value, start, end):
+  if not isinstance(value, (String, Bytes)):
+    return RuntimeResult().failure(fn.error("First argument must be string or bytes"))
+
+  if not isinstance(start, Number) or not isinstance(end, Number):
+    return RuntimeResult().failure(fn.error("Second and third arguments must be numbers"))
+
+  return RuntimeResult().success(value.slice(int(start.value), int(end.value)))
+
+@builtin("SUBSTR", 3)
+def builtin_substr(fn, value, start, length):
+  if not isinstance(value, String):
+    return RuntimeResult().failure(fn.error("First argument must be string"))
+
+  if not isinstance(start, Number) or not isinstance(length, Number):
+    return RuntimeResult().failure(fn.error("Second and third arguments must be numbers"))
+
+  start, _, _ = slice(int(start.value), None).indices(value.length())
+  return RuntimeResult().success(value.slice(start, start + max(int(length.value), 0)))
+
+@builtin("CHAR_AT", 2)
+def builtin_char_at(fn, value, index):
+  if not isinstance(value, String):
+    return RuntimeResult().failure(fn.error("First argument must be string"))
+
+  if not isinstance(index, Number):
+    return RuntimeResult().failure(fn.error("Second argument must be number"))
+
+  char = value.char_at(index.value)
+  if char is None:
+    return RuntimeResult().failure(fn.error('Character at this index could not be retrieved from string because index is out of bounds'))
+  return RuntimeResult().success(String(char))
+
+def check_dict_key(fn, dict_, key, allow_set=False):
+  if not isinstance(dict_, Dict) and not (allow_set and isinstance(dict_, Set)):
+    return fn.error("First argument must be dict or set" if allow_set else "First argument must be dict")
+
+  if key.hash_key() is None:
+    return fn.error("Dict keys must be numbers or strings")
+
+  return None
+
+@builtin("GET", 2)
+def builtin_get(fn, dict_, key):
+  error = check_dict_key(fn, dict_, key)
+  if error: return RuntimeResult().failure(error)
+
+  value = dict_.get(key)
+  if value is None:
+    return RuntimeResult().failure(fn.error(f"Key {key!r} not found in dict"))
+  return RuntimeResult().success(value)
+
+@builtin("SET", 3)
+def builtin_set(fn, dict_, key, value):
+  error = check_dict_key(fn, dict_, key)
+  if error: return RuntimeResult().failure(error)
+
+  if isinstance(value, StringView): value.compact()
+  dict_.set(key, value)
+  return RuntimeResult().success(Number.null)
+
+@builtin("HAS", 2)
+def builtin_has(fn, dict_, key):
+  error = check_dict_key(fn, dict_, key, allow_set=True)
+  if error: return RuntimeResult().failure(error)
+
+  return RuntimeResult().success(Number.true if dict_.has(key) else Number.false)
+
+@builtin("DELETE", 2)
+def builtin_delete(fn, dict_, key):
+  error = check_dict_key(fn, dict_, key, allow_set=True)
+  if error: return RuntimeResult().failure(error)
+
+  if not dict_.delete(key):
+    return RuntimeResult().failure(fn.error(f"Key {key!r} not found in dict" if isinstance(dict_, Dict) else f"{key!r} not found in set"))
+  return RuntimeResult().success(Number.null)
+
+@builtin("KEYS", 1)
+def builtin_keys(fn, dict_):
+  if not isinstance(dict_, Dict):
+    return RuntimeResult().failure(fn.error("Argument must be dict"))
+
+  return RuntimeResult().success(List(dict_.keys()))
+
+@builtin("VALUES", 1)
+def builtin_values(fn, dict_):
+  if not isinstance(dict_, Dict):
+    return RuntimeResult().failure(fn.error("Argument must be dict"))
+
+  return RuntimeResult().success(List(dict_.values()))
+
+@builtin("TO_SET", 1)
+def builtin_to_set(fn, list_):
+  iterator = list_.iterate()
+  if iterator is None:
+    return RuntimeResult().failure(fn.error("Argument must be iterable"))
+
+  entries = {}
+  try:
+    for element in iterator:
+      key = element.hash_key()
+      if key is None:
+        return RuntimeResult().failure(fn.error("Set elements must be numbers or strings"))
+      entries.setdefault(key, element)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(Set(entries))
+
+@builtin("ADD", 2)
+def builtin_add(fn, set_, value):
+  if not isinstance(set_, Set):
+    return RuntimeResult().failure(fn.error("First argument must be set"))
+
+  if value.hash_key() is None:
+    return RuntimeResult().failure(fn.error("Set elements must be numbers or strings"))
+
+  set_.add(value)
+  return RuntimeResult().success(Number.null)
+
+def check_sets(fn, setA, setB):
+  if not isinstance(setA, Set):
+    return fn.error("First argument must be set")
+
+  if not isinstance(setB, Set):
+    return fn.error("Second argument must be set")
+
+  return None
+
+@builtin("UNION", 2)
+def builtin_union(fn, setA, setB):
+  error = check_sets(fn, setA, setB)
+  if error: return RuntimeResult().failure(error)
+
+  return RuntimeResult().success(setA.union(setB))
+
+@builtin("INTERSECT", 2)
+def builtin_intersect(fn, setA, setB):
+  error = check_sets(fn, setA, setB)
+  if error: return RuntimeResult().failure(error)
+
+  return RuntimeResult().success(setA.intersection(setB))
+
+@builtin("DIFF", 2)
+def builtin_diff(fn, setA, setB):
+  error = check_sets(fn, setA, setB)
+  if error: return RuntimeResult().failure(error)
+
+  return RuntimeResult().success(setA.difference(setB))
+
+@builtin("RANGE", 3)
+def builtin_range(fn, start, end, step):
+  if not all(isinstance(x, Number) for x in (start, end, step)):
+    return RuntimeResult().failure(fn.error("Arguments must be numbers"))
+
+  if step.value == 0:
+    return RuntimeResult().failure(fn.error("Step must not be zero"))
+
+  return RuntimeResult().success(Range(start.value, end.value, step.value))
+
+@builtin("TO_LIST", 1)
+def builtin_to_list(fn, value):
+  iterator = value.iterate()
+  if iterator is None:
+    return RuntimeResult().failure(fn.error("Argument must be iterable"))
+
+  try:
+    elements = list(iterator)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+  return RuntimeResult().success(List(elements))
+
+def call_function(fn, func, args):
+  """
+      Calls a Yeep function value from a native loop, without the copies visit_CallNode makes.
+
+      Returns:
+          tuple: The return value and an error, one of which is None.
+  """
+  if not isinstance(func, BaseFunction):
+    return None, fn.error("Argument must be function")
+
+  res = func.execute(args)
+  return res.value, res.error
+
+def iterate_argument(fn, value):
+  iterator = value.iterate()
+  if iterator is None:
+    return None, fn.error("First argument must be iterable")
+  return iterator, None
+
+@builtin("MAP", 2)
+def builtin_map(fn, list_, func):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  elements = []
+  try:
+    for element in iterator:
+      value, error = call_function(fn, func, [element])
+      if error: return RuntimeResult().failure(error)
+      elements.append(value)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(List(elements))
+
+@builtin("FILTER", 2)
+def builtin_filter(fn, list_, func):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  elements = []
+  try:
+    for element in iterator:
+      value, error = call_function(fn, func, [element])
+      if error: return RuntimeResult().failure(error)
+      if value.is_true(): elements.append(element)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(List(elements))
+
+@builtin("REDUCE", 2, optional=1)
+def builtin_reduce(fn, list_, func, accumulator=None):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    for element in iterator:
+      if accumulator is None:
+        accumulator = element
+        continue
+      accumulator, error = call_function(fn, func, [accumulator, element])
+      if error: return RuntimeResult().failure(error)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  if accumulator is None:
+    return RuntimeResult().failure(fn.error("Cannot reduce an empty list without an initial value"))
+  return RuntimeResult().success(accumulator)
+
+@builtin("ANY", 1, optional=1)
+def builtin_any(fn, list_, func=None):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    for element in iterator:
+      if func is not None:
+        element, error = call_function(fn, func, [element])
+        if error: return RuntimeResult().failure(error)
+      if element.is_true(): return RuntimeResult().success(Number.true)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(Number.false)
+
+@builtin("ALL", 1, optional=1)
+def builtin_all(fn, list_, func=None):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    for element in iterator:
+      if func is not None:
+        element, error = call_function(fn, func, [element])
+        if error: return RuntimeResult().failure(error)
+      if not element.is_true(): return RuntimeResult().success(Number.false)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(Number.true)
+
+@builtin("SORT", 1, optional=2)
+def builtin_sort(fn, list_, func=None, reverse=None):
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    elements = list(iterator)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  # NULL as the key means "sort by the elements themselves", so a reverse flag can follow it
+  if isinstance(func, Number) and func.value == 0:
+    func = None
+
+  keys = []
+  for element in elements:
+    if func is not None:
+      element, error = call_function(fn, func, [element])
+      if error: return RuntimeResult().failure(error)
+
+    key = comparison_key(element)
+    if key is None:
+      return RuntimeResult().failure(fn.error("Sort keys must be numbers or strings"))
+    keys.append(key)
+
+  # Timsort over the extracted keys, then reorder the elements in one pass
+  try:
+    order = sorted(range(len(elements)), key=keys.__getitem__, reverse=bool(reverse and reverse.is_true()))
+  except TypeError:
+    return RuntimeResult().failure(fn.error("Cannot sort a mix of numbers and strings"))
+
+  return RuntimeResult().success(List([elements[i] for i in order]))
+
+def bisect_list(fn, list_, value, search):
+  if not isinstance(list_, List):
+    return None, None, fn.error("First argument must be list")
+
+  key = comparison_key(value)
+  if key is None:
+    return None, None, fn.error("Second argument must be number or string")
+
+  try:
+    index = search(ComparisonKeys(list_.elements), key)
+  except TypeError:
+    return None, None, fn.error("List elements must all be numbers or all be strings")
+  return list_, index, None
+
+@builtin("BISECT_LEFT", 2)
+def builtin_bisect_left(fn, list_, value):
+  _, index, error = bisect_list(fn, list_, value, bisect.bisect_left)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(Number(index))
+
+@builtin("BISECT_RIGHT", 2)
+def builtin_bisect_right(fn, list_, value):
+  _, index, error = bisect_list(fn, list_, value, bisect.bisect_right)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(Number(index))
+
+@builtin("INSORT", 2)
+def builtin_insort(fn, list_, value):
+  list_, index, error = bisect_list(fn, list_, value, bisect.bisect_right)
+  if error: return RuntimeResult().failure(error)
+
+  list_.elements.insert(index, value)
+  return RuntimeResult().success(Number(index))
+
+@builtin("DEQUE", 0, optional=1)
+def builtin_deque(fn, list_=None):
+  if list_ is None:
+    return RuntimeResult().success(Deque())
+
+  iterator = list_.iterate()
+  if iterator is None:
+    return RuntimeResult().failure(fn.error("Argument must be iterable"))
+
+  try:
+    return RuntimeResult().success(Deque(deque(iterator)))
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+@builtin("HEAP", 0, optional=1)
+def builtin_heap(fn, list_=None):
+  heap = Heap()
+
+  if list_ is None:
+    return RuntimeResult().success(heap)
+
+  iterator = list_.iterate()
+  if iterator is None:
+    return RuntimeResult().failure(fn.error("Argument must be iterable"))
+
+  try:
+    for element in iterator:
+      key = heap.key_for(element)
+      if key is None:
+        return RuntimeResult().failure(fn.error("Heap priorities must all be numbers or all be strings"))
+      heap.entries.append((key, next(heap.counter), element))
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  heapq.heapify(heap.entries)
+  return RuntimeResult().success(heap)
+
+@builtin("PUSH_FRONT", 2)
+def builtin_push_front(fn, deque_, value):
+  if not isinstance(deque_, Deque):
+    return RuntimeResult().failure(fn.error("First argument must be deque"))
+
+  deque_.elements.appendleft(value)
+  return RuntimeResult().success(Number.null)
+
+@builtin("PUSH_BACK", 2)
+def builtin_push_back(fn, deque_, value):
+  if not isinstance(deque_, Deque):
+    return RuntimeResult().failure(fn.error("First argument must be deque"))
+
+  deque_.elements.append(value)
+  return RuntimeResult().success(Number.null)
+
+@builtin("POP_FRONT", 1)
+def builtin_pop_front(fn, deque_):
+  if not isinstance(deque_, Deque):
+    return RuntimeResult().failure(fn.error("Argument must be deque"))
+
+  if not deque_.elements:
+    return RuntimeResult().failure(fn.error("Cannot pop from an empty deque"))
+  return RuntimeResult().success(deque_.elements.popleft())
+
+@builtin("POP_BACK", 1)
+def builtin_pop_back(fn, deque_):
+  if not isinstance(deque_, Deque):
+    return RuntimeResult().failure(fn.error("Argument must be deque"))
+
+  if not deque_.elements:
+    return RuntimeResult().failure(fn.error("Cannot pop from an empty deque"))
+  return RuntimeResult().success(deque_.elements.pop())
+
+@builtin("HEAP_PUSH", 2)
+def builtin_heap_push(fn, heap, value):
+  if not isinstance(heap, Heap):
+    return RuntimeResult().failure(fn.error("First argument must be heap"))
+
+  if not heap.push(value):
+    return RuntimeResult().failure(fn.error("Heap priorities must all be numbers or all be strings"))
+  return RuntimeResult().success(Number.null)
+
+@builtin("HEAP_POP", 1)
+def builtin_heap_pop(fn, heap):
+  if not isinstance(heap, Heap):
+    return RuntimeResult().failure(fn.error("Argument must be heap"))
+
+  if not heap.entries:
+    return RuntimeResult().failure(fn.error("Cannot pop from an empty heap"))
+  return RuntimeResult().success(heap.pop())
+
+@builtin("PEEK", 1)
+def builtin_peek(fn, value):
+  if isinstance(value, Heap):
+    if value.entries: return RuntimeResult().success(value.peek())
+  elif isinstance(value, Deque):
+    if value.elements: return RuntimeResult().success(value.elements[0])
+  else:
+    return RuntimeResult().failure(fn.error("Argument must be deque or heap"))
+
+  return RuntimeResult().failure(fn.error(f"Cannot peek into an empty {'heap' if isinstance(value, Heap) else 'deque'}"))
+
+@builtin("BYTES", 1)
+def builtin_bytes(fn, value):
+  if isinstance(value, Bytes):
+    return RuntimeResult().success(Bytes(value.to_bytes()))
+
+  if isinstance(value, List):
+    if not all(isinstance(x, Number) and isinstance(x.value, int) and 0 <= x.value < 256 for x in value.elements):
+      return RuntimeResult().failure(fn.error("List elements must be integers from 0 to 255"))
+    return RuntimeResult().success(Bytes(bytes([x.value for x in value.elements])))
+
+  return RuntimeResult().failure(fn.error("Argument must be list or bytes"))
+
+@builtin("ENCODE", 1, optional=1)
+def builtin_encode(fn, value, encoding=None):
+  if not isinstance(value, String):
+    return RuntimeResult().failure(fn.error("First argument must be string"))
+
+  if encoding is not None and not isinstance(encoding, String):
+    return RuntimeResult().failure(fn.error("Second argument must be string"))
+
+  try:
+    data = value.value.encode(encoding.value if encoding else 'utf-8')
+  except (LookupError, UnicodeError) as e:
+    return RuntimeResult().failure(fn.error(f"Failed to encode string\n" + str(e)))
+  return RuntimeResult().success(Bytes(data))
+
+@builtin("DECODE", 1, optional=1)
+def builtin_decode(fn, value, encoding=None):
+  if not isinstance(value, Bytes):
+    return RuntimeResult().failure(fn.error("First argument must be bytes"))
+
+  if encoding is not None and not isinstance(encoding, String):
+    return RuntimeResult().failure(fn.error("Second argument must be string"))
+
+  try:
+    text = value.decode(encoding.value if encoding else 'utf-8')
+  except (LookupError, UnicodeError) as e:
+    return RuntimeResult().failure(fn.error(f"Failed to decode bytes\n" + str(e)))
+  return RuntimeResult().success(String(text))
+
+@builtin("GET_BYTE", 2)
+def builtin_get_byte(fn, value, index):
+  if not isinstance(value, Bytes):
+    return RuntimeResult().failure(fn.error("First argument must be bytes"))
+
+  if not isinstance(index, Number):
+    return RuntimeResult().failure(fn.error("Second argument must be number"))
+
+  byte = value.get_byte(index.value)
+  if byte is None:
+    return RuntimeResult().failure(fn.error('Byte at this index could not be retrieved because index is out of bounds'))
+  return RuntimeResult().success(Number(byte))
+
+@builtin("FIND", 2, optional=1)
+def builtin_find(fn, value, sub, start=None):
+  if isinstance(value, String):
+    if not isinstance(sub, String):
+      return RuntimeResult().failure(fn.error("Second argument must be string"))
+    needle = sub.value
+  elif isinstance(value, Bytes):
+    if isinstance(sub, String):
+      needle = sub.value.encode('utf-8')
+    elif isinstance(sub, Bytes):
+      needle = sub.view()
+    else:
+      return RuntimeResult().failure(fn.error("Second argument must be bytes or string"))
+  else:
+    return RuntimeResult().failure(fn.error("First argument must be string or bytes"))
+
+  if start is not None and not isinstance(start, Number):
+    return RuntimeResult().failure(fn.error("Third argument must be number"))
+
+  start = int(start.value) if start else 0
+  if isinstance(value, String):
+    return RuntimeResult().success(Number(value.value.find(needle, start)))
+  return RuntimeResult().success(Number(value.find(needle, start)))
+
+def file_path_argument(fn, path):
+  if not isinstance(path, String):
+    return None, fn.error("First argument must be string")
+  return path.value, None
+
+@builtin("READ_FILE", 1)
+def builtin_read_file(fn, path):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    with open_file(path) as f:
+      text = f.read()
+  except FILE_ERRORS as e:
+    return RuntimeResult().failure(fn.error(f"Failed to read file \"{path}\"\n" + str(e)))
+  return RuntimeResult().success(String(text))
+
+@builtin("READ_BYTES", 1)
+def builtin_read_bytes(fn, path):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+
+  try:
+    with open_file(path, "rb") as f:
+      if isinstance(f.raw, io.FileIO) and os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      else:
+        data = f.read()
+  except FILE_ERRORS + (ValueError,) as e:
+    return RuntimeResult().failure(fn.error(f"Failed to read file \"{path}\"\n" + str(e)))
+  return RuntimeResult().success(Bytes(data))
+
+@builtin("LINES", 1)
+def builtin_lines(fn, path):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(FileLines(path))
+
+def write_chunks(fn, path, value, mode):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+
+  if isinstance(value, Bytes):
+    chunks, mode = (value.view(),), mode + "b"
+  elif isinstance(value, String):
+    chunks = value.rope()[0]
+  elif isinstance(value, StringBuilder):
+    chunks = value.parts
+  else:
+    iterator = value.iterate()
+    if iterator is None:
+      return RuntimeResult().failure(fn.error("Second argument must be string, bytes or iterable"))
+    chunks = (str(line) + "\n" for line in iterator)
+
+  try:
+    with open_file(path, mode) as f:
+      f.writelines(chunks)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+  except FILE_ERRORS as e:
+    return RuntimeResult().failure(fn.error(f"Failed to write file \"{path}\"\n" + str(e)))
+  return RuntimeResult().success(Number.null)
+
+@builtin("WRITE_FILE", 2)
+def builtin_write_file(fn, path, value):
+  return write_chunks(fn, path, value, "w")
+
+@builtin("APPEND_FILE", 2)
+def builtin_append_file(fn, path, value):
+  return write_chunks(fn, path, value, "a")
+
+@builtin("CSV_ROWS", 1, optional=1)
+def builtin_csv_rows(fn, path, header=None):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(CsvRows(path, header is not None and header.is_true()))
+
+@builtin("JSONL_ROWS", 1)
+def builtin_jsonl_rows(fn, path):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+  return RuntimeResult().success(JsonlRows(path))
+
+def write_rows(fn, path, rows, write):
+  path, error = file_path_argument(fn, path)
+  if error: return RuntimeResult().failure(error)
+
+  iterator = rows.iterate()
+  if iterator is None:
+    return RuntimeResult().failure(fn.error("Second argument must be iterable"))
+
+  try:
+    with open_file(path, "w", newline='') as f:
+      write(f, iterator)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+  except FILE_ERRORS + (ValueError, csv.Error) as e:
+    return RuntimeResult().failure(fn.error(f"Failed to write file \"{path}\"\n" + str(e)))
+  return RuntimeResult().success(Number.null)
+
+@builtin("CSV_WRITE", 2)
+def builtin_csv_write(fn, path, rows):
+  return write_rows(fn, path, rows, write_csv_rows)
+
+@builtin("JSONL_WRITE", 2)
+def builtin_jsonl_write(fn, path, rows):
+  return write_rows(fn, path, rows, write_jsonl_rows)
+
+ARGUMENT_ORDINALS = ("First", "Second", "Third", "Fourth")
+
+def string_arguments(fn, *values, first=0):
+  """
+    Returns the Python strings of the given arguments, or an error naming the first argument that
+    is not a string. Optional arguments that were left out come back as None. The first argument
+    is counted as argument number first + 1 in the error.
+  """
+  strings = []
+  for ordinal, value in zip(ARGUMENT_ORDINALS[first:], values):
+    if value is not None and not isinstance(value, String):
+      return None, fn.error(f"{ordinal} argument must be string")
+    strings.append(None if value is None else value.value)
+  return strings, None
+
+@builtin("SPLIT", 1, optional=1)
+def builtin_split(fn, value, sep=None):
+  strings, error = string_arguments(fn, value, sep)
+  if error: return RuntimeResult().failure(error)
+  value, sep = strings
+
+  if sep == "":
+    return RuntimeResult().failure(fn.error("Separator must not be empty"))
+  return RuntimeResult().success(List(list(map(String, value.split(sep)))))
+
+@builtin("JOIN", 1, optional=1)
+def builtin_join(fn, list_, sep=None):
+  strings, error = string_arguments(fn, sep, first=1)
+  if error: return RuntimeResult().failure(error)
+  sep = strings[0]
+
+  iterator, error = iterate_argument(fn, list_)
+  if error: return RuntimeResult().failure(error)
+
+  strings = []
+  try:
+    for element in iterator:
+      if not isinstance(element, String):
+        return RuntimeResult().failure(fn.error("Elements to join must be strings"))
+      strings.append(element.value)
+  except IterationError as e:
+    return RuntimeResult().failure(e.error)
+
+  return RuntimeResult().success(String((sep or "").join(strings)))
+
+@builtin("REPLACE", 3, optional=1)
+def builtin_replace(fn, value, old, new, count=None):
+  strings, error = string_arguments(fn, value, old, new)
+  if error: return RuntimeResult().failure(error)
+  value, old, new = strings
+
+  if count is not None and not (isinstance(count, Number) and isinstance(count.value, int)):
+    return RuntimeResult().failure(fn.error("Fourth argument must be integer"))
+  return RuntimeResult().success(String(value.replace(old, new, -1 if count is None else count.value)))
+
+@builtin("STARTS_WITH", 2)
+def builtin_starts_with(fn, value, prefix):
+  strings, error = string_arguments(fn, value, prefix)
+  if error: return RuntimeResult().failure(error)
+  value, prefix = strings
+  return RuntimeResult().success(Number.true if value.startswith(prefix) else Number.false)
+
+@builtin("ENDS_WITH", 2)
+def builtin_ends_with(fn, value, suffix):
+  strings, error = string_arguments(fn, value, suffix)
+  if error: return RuntimeResult().failure(error)
+  value, suffix = strings
+  return RuntimeResult().success(Number.true if value.endswith(suffix) else Number.false)
+
+@builtin("TRIM", 1, optional=1)
+def builtin_trim(fn, value, chars=None):
+  strings, error = string_arguments(fn, value, chars)
+  if error: return RuntimeResult().failure(error)
+  value, chars = strings
+  return RuntimeResult().success(String(value.strip(chars)))
+
+@builtin("UPPER", 1)
+def builtin_upper(fn, value):
+  strings, error = string_arguments(fn, value)
+  if error: return RuntimeResult().failure(error)
+  value = strings[0]
+  return RuntimeResult().success(String(value.upper()))
+
+@builtin("LOWER", 1)
+def builtin_lower(fn, value):
+  strings, error = string_arguments(fn, value)
+  if error: return RuntimeResult().failure(error)
+  value = strings[0]
+  return RuntimeResult().success(String(value.lower()))
+
+@builtin("TO_NUMBER", 1)
+def builtin_to_number(fn, value):
+  if isinstance(value, Number):
+    return RuntimeResult().success(Number(value.value))
+
+  if isinstance(value, String):
+    try:
+      return RuntimeResult().success(convert_number(value.value))
+    except ValueError:
+      pass
+
+  return RuntimeResult().failure(fn.error(f"{value!r} cannot be converted to a number"))
+
+@builtin("TO_STRING", 1)
+def builtin_to_string(fn, value):
+  if isinstance(value, String):
+    return RuntimeResult().success(value.copy())
+  return RuntimeResult().success(String(str(value)))
+
+def regex_arguments(fn, value, pattern, *others, flags=None):
+  """
+    Returns the pattern compiled with flags, and the Python strings of value and the other
+    arguments, which come between the pattern and the optional flags.
+  """
+  strings, error = string_arguments(fn, value, pattern, *others, flags)
+  if error: return None, None, error
+
+  try:
+    compiled = regex_cache.compile(strings[1], strings[-1] or '')
+  except (re.error, ValueError) as e:
+    return None, None, fn.error("Invalid regular expression\n" + str(e))
+  return compiled, [strings[0]] + strings[2:-1], None
+
+def match_result(match):
+  if match is None: return Number.null
+  return to_yeep((match.group(0),) + match.groups())
+
+@builtin("MATCH", 2, optional=1)
+def builtin_match(fn, value, pattern, flags=None):
+  compiled, strings, error = regex_arguments(fn, value, pattern, flags=flags)
+  if error: return RuntimeResult().failure(error)
+  value = strings[0]
+  return RuntimeResult().success(match_result(compiled.match(value)))
+
+@builtin("SEARCH", 2, optional=1)
+def builtin_search(fn, value, pattern, flags=None):
+  compiled, strings, error = regex_arguments(fn, value, pattern, flags=flags)
+  if error: return RuntimeResult().failure(error)
+  value = strings[0]
+  return RuntimeResult().success(match_result(compiled.search(value)))
+
+@builtin("FIND_ALL", 2, optional=1)
+def builtin_find_all(fn, value, pattern, flags=None):
+  compiled, strings, error = regex_arguments(fn, value, pattern, flags=flags)
+  if error: return RuntimeResult().failure(error)
+  value = strings[0]
+  return RuntimeResult().success(to_yeep(compiled.findall(value)))
+
+@builtin("SUB", 3, optional=1)
+def builtin_sub(fn, value, pattern, replacement, flags=None):
+  compiled, strings, error = regex_arguments(fn, value, pattern, replacement, flags=flags)
+  if error: return RuntimeResult().failure(error)
+  value, replacement = strings
+
+  try:
+    return RuntimeResult().success(String(compiled.sub(replacement, value)))
+  except (re.error, IndexError) as e:
+    return RuntimeResult().failure(fn.error("Invalid replacement\n" + str(e)))
+
+@builtin("REGEX_CACHE_STATS", 0)
+def builtin_regex_cache_stats(fn):
+  return RuntimeResult().success(to_yeep(regex_cache.stats()))
+
+#################################################################################################
+#####   PYTHON FFI
+#####   Python callables and objects exposed to Yeep programs, converted at the boundary.
+#####   Sequences cross the boundary as views on both sides instead of being copied.
+#################################################################################################
+
+class PythonSequence(Value):
+  """
+    A Python list, tuple, array.array or NumPy array used from Yeep without copying it.
+    Elements are converted with from_python only when they are read.
+  """
+  def __init__(self, items):
+    super().__init__()
+    self.items = items
+
+  def length(self):
+    return len(self.items)
+
+  def iterate(self):
+    return map(from_python, self.items)
+
+  def dived_by(self, other):
+    if isinstance(other, Number) and isinstance(other.value, int):
+      try:
+        return from_python(self.items[other.value]).set_context(self.context), None
+      except IndexError:
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Element at this index could not be retrieved from list because index is out of bounds',
+          self.context
+        )
+    else:
+      return None, Value.illegal_operation(self, other)
+
+  def is_true(self):
+    return len(self.items) > 0
+
+  def copy(self):
+    copy = PythonSequence(self.items)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([str(x) for x in self.iterate()])
+
+  def __repr__(self):
+    return f'[{", ".join([repr(x) for x in self.iterate()])}]'
+
+class PythonObject(Value):
+  """
+    Any other Python object, passed through Yeep unchanged and handed back to Python as itself.
+  """
+  def __init__(self, obj):
+    super().__init__()
+    self.obj = obj
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = PythonObject(self.obj)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<python {type(self.obj).__name__}>'
+
+class ListView(Sequence):
+  """
+    A read-only Python sequence over the elements of a Yeep List, converting each element when it
+    is accessed, so a Python function can take a Yeep list without it being copied first.
+  """
+  def __init__(self, elements):
+    self.elements = elements
+
+  def __len__(self):
+    return len(self.elements)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return ListView(self.elements[index])
+    return to_python_value(self.elements[index])
+
+  def __iter__(self):
+    return map(to_python_value, self.elements)
+
+  def __repr__(self):
+    return f'ListView({list(self)!r})'
+
+def wrap_function(func):
+  """
+    Returns a Python callable that calls the Yeep function func.
+    An error inside func is raised as IterationError, which PythonFunction reports as the Yeep error.
+  """
+  def call(*args):
+    res = func.execute([from_python(arg) for arg in args])
+    if res.error: raise IterationError(res.error)
+    return to_python_value(res.value)
+  return call
+
+TO_PYTHON = {
+  Number: operator.attrgetter('value'),
+  String: operator.attrgetter('value'),
+  List: lambda value: ListView(value.elements),
+  PythonSequence: operator.attrgetter('items'),
+  PythonObject: operator.attrgetter('obj'),
+  BaseFunction: wrap_function,
+}
+
+def to_python_converter(value_type):
+  """
+    Returns the function that converts Yeep values of value_type for a Python call.
+    Subclasses use their nearest listed base, and anything else is copied with to_python.
+  """
+  converter = TO_PYTHON.get(value_type)
+  if converter is None:
+    converter = next((TO_PYTHON[base] for base in value_type.__mro__ if base in TO_PYTHON), to_python)
+    TO_PYTHON[value_type] = converter
+  return converter
+
+def to_python_value(value):
+  return to_python_converter(type(value))(value)
+
+FROM_PYTHON = {
+  bool: lambda value: Number.true if value else Number.false,
+  int: Number,
+  float: Number,
+  str: String,
+  list: PythonSequence,
+  tuple: PythonSequence,
+  array.array: PythonSequence,
+  type(None): lambda value: Number.null,
+}
+
+def from_python_converter(value_type):
+  """
+    Returns the function that converts Python results of value_type into Yeep values.
+    Sequences are wrapped rather than copied, dicts are copied, and other objects are wrapped whole.
+  """
+  converter = FROM_PYTHON.get(value_type)
+  if converter is None:
+    if issubclass(value_type, Value):
+      converter = lambda value: value
+    elif numpy is not None and issubclass(value_type, numpy.ndarray):
+      converter = PythonSequence
+    elif numpy is not None and issubclass(value_type, numpy.generic):
+      converter = lambda value: from_python(value.item())
+    elif issubclass(value_type, dict):
+      converter = to_yeep
+    else:
+      converter = next((FROM_PYTHON[base] for base in value_type.__mro__ if base in FROM_PYTHON), PythonObject)
+    FROM_PYTHON[value_type] = converter
+  return converter
+
+def from_python(value):
+  return from_python_converter(type(value))(value)
+
+class PythonFunction(BaseFunction):
+  """
+    A Python callable exposed to Yeep.
+
+    Arguments are converted on every call with a plan looked up by the tuple of argument types,
+    so the conversion for a given signature is worked out once. The result is converted back with
+    from_python, and an exception raised by the callable becomes a runtime error.
+  """
+  def __init__(self, name, func, plans=None):
+    super().__init__(name)
+    self.func = func
+    self.plans = plans if plans is not None else {}
+
+  def execute(self, args):
+    signature = tuple(map(type, args))
+    plan = self.plans.get(signature)
+    if plan is None:
+      plan = self.plans[signature] = tuple(map(to_python_converter, signature))
 
     try:
-      with open(fn, "r") as f:
-        script = f.read()
+      result = self.func(*[convert(arg) for convert, arg in zip(plan, args)])
+    except IterationError as e:
+      return RuntimeResult().failure(e.error)
     except Exception as e:
       return RuntimeResult().failure(RTError(
         self.pos_start, self.pos_end,
-        f"Failed to load script \"{fn}\"\n" + str(e),
-        exec_ctx
+        f"Python function {self.name} raised {type(e).__name__}: {e}",
+        self.context
       ))
+    return RuntimeResult().success(from_python(result))
+
+  def copy(self):
+    copy = PythonFunction(self.name, self.func, self.plans)
+    copy.set_context(self.context)
+    copy.set_pos(self.pos_start, self.pos_end)
+    return copy
+
+  def __repr__(self):
+    return f"<python function {self.name}>"
+
+def expose(name, value, symbol_table=None):
+  """
+    Makes a Python callable or object available to Yeep programs under name.
+
+    Callables become PythonFunction values; other objects are converted with from_python, so
+    lists and arrays are shared with Python rather than copied. Without a symbol table the value
+    is added next to the built-ins and is visible to every program.
+  """
+  if callable(value) and not isinstance(value, Value):
+    value = PythonFunction(name.lower(), value)
+  else:
+    value = from_python(value)
+
+  if symbol_table is None:
+    BUILTINS[name] = value
+  else:
+    symbol_table.set(name, value)
+  return value
+
+#################################################################################################
+#####   OUTPUT
+#####   The output sink collects everything a program prints and hands it to the host in chunks.
+#################################################################################################
+
+class OutputSink:
+  """
+    Buffers program output and writes it to a target once buffer_size characters have collected.
+
+    Attributes:
+        target: A file-like object with a write method, a callable taking each chunk of text,
+            or None to write to whatever sys.stdout is when the buffer is flushed.
+        buffer_size (int): Number of characters to collect before flushing; 0 writes through.
+  """
+  def __init__(self, target=None, buffer_size=OUTPUT_BUFFER_SIZE):
+    self.target = target
+    self.buffer_size = buffer_size
+    self.chunks = []
+    self.size = 0
+
+  def write(self, text):
+    self.chunks.append(text)
+    self.size += len(text)
+    if self.size >= self.buffer_size:
+      self.flush()
+
+  def flush(self):
+    target = sys.stdout if self.target is None else self.target
+
+    if self.chunks:
+      text = ''.join(self.chunks)
+      self.chunks = []
+      self.size = 0
+
+      if callable(target):
+        target(text)
+      else:
+        target.write(text)
+
+    if hasattr(target, 'flush'):
+      target.flush()
+
+#################################################################################################
+#####   INPUT
+#####   The input source reads what a program consumes from the host through one buffered stream.
+#################################################################################################
+
+class InputSource:
+  """
+    The stream INPUT, INPUT_INT, INPUT_LINES, INPUT_NUMBERS and READ_ALL_INPUT read from.
+
+    In strict mode bad data and the end of input are reported as errors instead of prompting the
+    user again, which is what batch jobs need; it is on by default when the stream is not a terminal.
+
+    Attributes:
+        stream: A file-like object opened for reading text, or None to read from sys.stdin.
+        strict (bool): Whether to fail instead of prompting again.
+  """
+  def __init__(self, stream=None, strict=None):
+    self.stream = stream
+    if strict is None:
+      isatty = getattr(self.get_stream(), 'isatty', None)
+      strict = not (isatty and isatty())
+    self.strict = strict
+
+  def get_stream(self):
+    return sys.stdin if self.stream is None else self.stream
+
+  def read_line(self):
+    line = self.get_stream().readline()
+    if not line: return None
+    return line[:-1] if line.endswith('\n') else line
+
+  def read_all(self):
+    return self.get_stream().read()
+
+  def lines(self):
+    for line in self.get_stream():
+      yield String(line[:-1] if line.endswith('\n') else line)
+
+  def numbers(self):
+    stream = self.get_stream()
+    numbers = []
+    rest = ''
+
+    while True:
+      chunk = stream.read(FILE_BUFFER_SIZE)
+      if not chunk: break
+
+      tokens = (rest + chunk).split()
+      rest = tokens.pop() if tokens and not chunk[-1].isspace() else ''
+      numbers.extend(parse_numbers(tokens))
+
+    numbers.extend(parse_numbers(rest.split()))
+    return numbers
+
+class InputLines(Value):
+  """
+    The remaining lines of an input source, read lazily without their line endings.
+  """
+  def __init__(self, source):
+    super().__init__()
+    self.source = source
+
+  def iterate(self):
+    return self.source.lines()
+
+  def is_true(self):
+    return True
+
+  def copy(self):
+    copy = InputLines(self.source)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
 
-    _, error = run(fn, script)
-    
-    if error:
-      return RuntimeResult().failure(RTError(
-        self.pos_start, self.pos_end,
-        f"Failed to finish executing script \"{fn}\"\n" +
-        error.as_string(),
-        exec_ctx
-      ))
+  def __repr__(self):
+    return '<input lines>'
 
-    return RuntimeResult().success(Number.null)
-  execute_run.arg_names = ["fn"]
-
-BuiltInFunction.print       = BuiltInFunction("print")
-BuiltInFunction.print_ret   = BuiltInFunction("print_ret")
-BuiltInFunction.input       = BuiltInFunction("input")
-BuiltInFunction.input_int   = BuiltInFunction("input_int")
-BuiltInFunction.clear       = BuiltInFunction("clear")
-BuiltInFunction.is_number   = BuiltInFunction("is_number")
-BuiltInFunction.is_string   = BuiltInFunction("is_string")
-BuiltInFunction.is_list     = BuiltInFunction("is_list")
-BuiltInFunction.is_function = BuiltInFunction("is_function")
-BuiltInFunction.append      = BuiltInFunction("append")
-BuiltInFunction.pop         = BuiltInFunction("pop")
-BuiltInFunction.extend      = BuiltInFunction("extend")
-BuiltInFunction.len					= BuiltInFunction("len")
-BuiltInFunction.run					= BuiltInFunction("run")
+def parse_numbers(tokens):
+  """
+    Parses a batch of tokens into Numbers, trying the whole batch as integers first.
+    Raises ValueError naming the first token that is not a number.
+  """
+  if all(map(DECIMAL_NUMBER.fullmatch, tokens)):
+    try:
+      return list(map(Number, map(int, tokens)))
+    except ValueError:
+      pass
+
+  numbers = []
+  for token in tokens:
+    try:
+      numbers.append(convert_number(token))
+    except ValueError:
+      raise ValueError(f"'{token}' is not a number") from None
+  return numbers
 
 #################################################################################################
 #####   CONTEXT
@@ -2136,6 +4928,10 @@ class Context:
     self.parent = parent
     self.parent_entry_pos = parent_entry_pos
     self.symbol_table = None
+    self.generator = None
+    self.output = parent.output if parent else None
+    self.input = parent.input if parent else None
+    self.vectorizer = parent.vectorizer if parent else loop_vectorizer
 
 #######################################
 # SYMBOL TABLE
@@ -2158,6 +4954,328 @@ class SymbolTable:
   def remove(self, name):
     del self.symbols[name]
 
+#################################################################################################
+#####   LOOP VECTORIZER
+#####   The loop vectorizer turns pure numeric FOR loops into bulk column operations.
+#####   Loops that cannot be proven safe are left to the scalar interpreter.
+#################################################################################################
+
+VECTOR_OPS = {
+  TT_PLUS: operator.add,
+  TT_MINUS: operator.sub,
+  TT_MUL: operator.mul,
+  TT_DIV: operator.truediv,
+  TT_POW: operator.pow,
+  TT_EE: lambda a, b: int(a == b),
+  TT_NE: lambda a, b: int(a != b),
+  TT_LT: lambda a, b: int(a < b),
+  TT_GT: lambda a, b: int(a > b),
+  TT_LTE: lambda a, b: int(a <= b),
+  TT_GTE: lambda a, b: int(a >= b),
+  'AND': lambda a, b: int(a and b),
+  'OR': lambda a, b: int(a or b),
+}
+
+NUMPY_OPS = (operator.add, operator.sub, operator.mul, operator.truediv)
+NUMPY_MIN_LENGTH = 64
+
+class VectorizeFallback(Exception):
+  """
+    Raised while evaluating a vector plan when the loop has to run on the scalar path instead.
+  """
+
+class VectorPlan:
+  """
+    The static shape of a vectorizable loop body: APPEND(out_name, expr_node).
+
+    Attributes:
+        callee_name (str): The name the loop body calls, expected to resolve to APPEND.
+        out_name (str): The name of the list being appended to.
+        expr_node (Any): The pure numeric expression evaluated for every iteration.
+  """
+  def __init__(self, callee_name, out_name, expr_node):
+    self.callee_name = callee_name
+    self.out_name = out_name
+    self.expr_node = expr_node
+
+class LoopVectorizer:
+  """
+    Detects data-parallel FOR loops of the form
+
+      FOR i = a TO b STEP s THEN APPEND(out, <numeric expr>)
+
+    and evaluates the expression for every i at once, using NumPy kernels for float columns
+    when NumPy is installed and C-level map() over the columns otherwise.
+    The same evaluation serves Program.evaluate_batch, with input columns in place of i.
+
+    Attributes:
+        enabled (bool): Whether FOR loops should be vectorized at all.
+        vectorized (dict): Maps (file, program text, line, col) of every vectorized loop to its
+            total iteration count. Programs often share a file name such as <stdin>, so the text
+            keeps their loops apart.
+  """
+  def __init__(self):
+    self.enabled = True
+    self.vectorized = {}
+
+  def report(self):
+    """
+        Returns a description of every loop that ran on the vectorized path. Loops of different
+        programs with the same file name are told apart by numbering the programs.
+    """
+    numbers = {}
+    programs = {}
+    for fn, text, _, _ in self.vectorized:
+      if (fn, text) not in numbers:
+        programs[fn] = programs.get(fn, 0) + 1
+        numbers[(fn, text)] = programs[fn]
+
+    lines = []
+    for (fn, text, ln, col), count in self.vectorized.items():
+      if programs[fn] > 1:
+        fn = f'{fn} (program {numbers[(fn, text)]})'
+      lines.append(f'{fn}:{ln + 1}:{col + 1}: {count} iterations vectorized')
+    return lines
+
+  def record(self, node, count):
+    pos = node.pos_start
+    key = (pos.fn, pos.ftxt, pos.ln, pos.col)
+    self.vectorized[key] = self.vectorized.get(key, 0) + count
+
+  ###################################
+
+  def plan_for(self, node):
+    if node.vector_plan is None:
+      node.vector_plan = self.analyze(node) or False
+    return node.vector_plan
+
+  def analyze(self, node):
+    body = node.body_node
+    if isinstance(body, ListNode):
+      if len(body.element_nodes) != 1: return None
+      body = body.element_nodes[0]
+
+    if not isinstance(body, CallNode) or len(body.arg_nodes) != 2: return None
+    if not isinstance(body.node_to_call, VarAccessNode): return None
+
+    out_node, expr_node = body.arg_nodes
+    if not isinstance(out_node, VarAccessNode): return None
+
+    loop_var = node.var_name_tok.value
+    out_name = out_node.var_name_tok.value
+    if out_name == loop_var: return None
+
+    names = set()
+    if not self.is_pure(expr_node, names): return None
+    if out_name in names: return None
+
+    return VectorPlan(body.node_to_call.var_name_tok.value, out_name, expr_node)
+
+  def is_pure(self, node, names):
+    if isinstance(node, NumberNode):
+      return True
+    if isinstance(node, VarAccessNode):
+      names.add(node.var_name_tok.value)
+      return True
+    if isinstance(node, UnaryOpNode):
+      return node.op_tok.type in (TT_PLUS, TT_MINUS) and self.is_pure(node.node, names)
+    if isinstance(node, BinOpNode):
+      return (
+        self.op_for(node.op_tok) is not None and
+        self.is_pure(node.left_node, names) and
+        self.is_pure(node.right_node, names)
+      )
+    return False
+
+  def op_for(self, op_tok):
+    if op_tok.type == TT_KEYWORD:
+      return VECTOR_OPS.get(op_tok.value)
+    return VECTOR_OPS.get(op_tok.type)
+
+  ###################################
+
+  def try_run(self, node, context, start_value, end_value, step_value):
+    """
+        Runs the loop on the vectorized path if possible.
+
+        Returns:
+            RuntimeResult or None: The result of the loop, or None if the scalar path must be used.
+    """
+    if not self.enabled: return None
+
+    plan = self.plan_for(node)
+    if not plan: return None
+
+    bounds = (start_value, end_value, step_value)
+    if not all(isinstance(v, Number) and type(v.value) is int for v in bounds): return None
+    if step_value.value == 0: return None
+
+    callee = context.symbol_table.get(plan.callee_name)
+    if not isinstance(callee, BuiltInFunction) or callee.name != 'append': return None
+
+    out = context.symbol_table.get(plan.out_name)
+    if not isinstance(out, List): return None
+
+    indices = range(start_value.value, end_value.value, step_value.value)
+    loop_var = node.var_name_tok.value
+
+    try:
+      column = self.eval(plan.expr_node, context, {loop_var: list(indices)}, out)
+    except VectorizeFallback:
+      return None
+
+    if numpy is not None and isinstance(column, numpy.ndarray):
+      column = column.tolist()
+    elif not isinstance(column, list):
+      column = [column] * len(indices)
+
+    expr_node = plan.expr_node
+    out.elements.extend([
+      Number(x).set_context(context).set_pos(expr_node.pos_start, expr_node.pos_end) for x in column
+    ])
+
+    if len(indices) > 0:
+      context.symbol_table.set(loop_var, Number(indices[-1]))
+
+    self.record(node, len(indices))
+
+    return RuntimeResult().success(
+      Number.null if node.should_return_null else
+      List([Number(0).set_context(context) for _ in indices]).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def try_batch(self, node, context, columns, length):
+    """
+        Evaluates a pure numeric expression for every row of a batch at once.
+
+        Returns:
+            list or None: The value for every row, or None if the rows must be evaluated one by one.
+    """
+    if not self.enabled or not self.is_pure(node, set()): return None
+    if not all(type(x) in (int, float) for column in columns.values() for x in column): return None
+
+    try:
+      column = self.eval(node, context, columns, None)
+    except VectorizeFallback:
+      return None
+
+    if numpy is not None and isinstance(column, numpy.ndarray):
+      column = column.tolist()
+    elif not isinstance(column, list):
+      column = [column] * length
+
+    self.record(node, length)
+    return column
+
+  def eval(self, node, context, columns, out):
+    """
+        Evaluates an expression for every iteration (or row) at once.
+
+        Returns:
+            list, numpy.ndarray or number: A column with one entry per iteration, or a loop-invariant scalar.
+    """
+    if isinstance(node, NumberNode):
+      return node.tok.value
+
+    if isinstance(node, VarAccessNode):
+      return self.eval_name(node.var_name_tok.value, context, columns)
+
+    if isinstance(node, UnaryOpNode):
+      value = self.eval(node.node, context, columns, out)
+      if node.op_tok.type == TT_MINUS:
+        try:
+          return self.apply(operator.mul, value, -1)
+        except (ArithmeticError, TypeError):
+          raise VectorizeFallback()
+      return value
+
+    # list / index gathers from a List, unless the name is a loop or batch column variable
+    if node.op_tok.type == TT_DIV and isinstance(node.left_node, VarAccessNode) and node.left_node.var_name_tok.value not in columns:
+      list_ = context.symbol_table.get(node.left_node.var_name_tok.value)
+      if isinstance(list_, List):
+        if out is not None and list_.elements is out.elements: raise VectorizeFallback()
+        return self.gather(list_, self.eval(node.right_node, context, columns, out))
+
+    left = self.eval(node.left_node, context, columns, out)
+    right = self.eval(node.right_node, context, columns, out)
+    op = self.op_for(node.op_tok)
+
+    if op is operator.truediv and self.has_zero(right): raise VectorizeFallback()
+
+    try:
+      return self.apply(op, left, right)
+    except (ArithmeticError, TypeError):
+      raise VectorizeFallback()
+
+  def eval_name(self, name, context, columns):
+    column = columns.get(name)
+    if column is not None:
+      return column
+
+    value = context.symbol_table.get(name)
+    if not isinstance(value, Number): raise VectorizeFallback()
+    return value.value
+
+  def gather(self, list_, index):
+    elements = list_.elements
+
+    try:
+      if isinstance(index, list):
+        if not all(type(i) is int for i in index): raise VectorizeFallback()
+        picked = [elements[i] for i in index]
+      elif numpy is not None and isinstance(index, numpy.ndarray):
+        raise VectorizeFallback()
+      else:
+        if type(index) is not int: raise VectorizeFallback()
+        picked = [elements[index]]
+    except IndexError:
+      raise VectorizeFallback()
+
+    if not all(isinstance(e, Number) for e in picked): raise VectorizeFallback()
+    values = [e.value for e in picked]
+    return values if isinstance(index, list) else values[0]
+
+  def has_zero(self, value):
+    if numpy is not None and isinstance(value, numpy.ndarray):
+      return bool((value == 0).any())
+    if isinstance(value, list):
+      return 0 in value
+    return value == 0
+
+  def apply(self, op, left, right):
+    left_col = isinstance(left, list) or (numpy is not None and isinstance(left, numpy.ndarray))
+    right_col = isinstance(right, list) or (numpy is not None and isinstance(right, numpy.ndarray))
+
+    if not left_col and not right_col:
+      return op(left, right)
+
+    if numpy is not None and op in NUMPY_OPS and self.numpy_ready(left) and self.numpy_ready(right):
+      return op(self.as_array(left), self.as_array(right))
+
+    if numpy is not None:
+      if isinstance(left, numpy.ndarray): left = left.tolist()
+      if isinstance(right, numpy.ndarray): right = right.tolist()
+
+    if left_col and right_col:
+      return list(map(op, left, right))
+    if left_col:
+      return list(map(op, left, repeat(right)))
+    return list(map(op, repeat(left), right))
+
+  def numpy_ready(self, value):
+    if isinstance(value, numpy.ndarray):
+      return True
+    if isinstance(value, list):
+      return len(value) >= NUMPY_MIN_LENGTH and all(type(x) is float for x in value)
+    return type(value) is float or (type(value) is int and abs(value) < 2 ** 53)
+
+  def as_array(self, value):
+    if isinstance(value, list):
+      return numpy.array(value, dtype=numpy.float64)
+    return value
+
+loop_vectorizer = LoopVectorizer()
+
 #################################################################################################
 #####   INTERPRETER
 #####   The interpreter takes the AST and executes the code.
@@ -2238,6 +5356,29 @@ class Interpreter:
       List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
     )
 
+  def visit_DictNode(self, node, context):
+    res = RuntimeResult()
+    dict_ = Dict()
+
+    for key_node, value_node in node.pair_nodes:
+      key = res.register(self.visit(key_node, context))
+      if res.should_return(): return res
+
+      if key.hash_key() is None:
+        return res.failure(RTError(
+          key_node.pos_start, key_node.pos_end,
+          'Dict keys must be numbers or strings',
+          context
+        ))
+
+      value = res.register(self.visit(value_node, context))
+      if res.should_return(): return res
+      dict_.set(key, value)
+
+    return res.success(
+      dict_.set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
   def visit_VarAccessNode(self, node, context):
     """
         Interprets a variable access node.
@@ -2279,6 +5420,7 @@ class Interpreter:
     value = res.register(self.visit(node.value_node, context))
     if res.should_return(): return res
 
+    if isinstance(value, StringView): value.compact()
     context.symbol_table.set(var_name, value)
     return res.success(value)
 
@@ -2392,6 +5534,9 @@ class Interpreter:
     else:
       step_value = Number(1)
 
+    vectorized = context.vectorizer.try_run(node, context, start_value, end_value, step_value)
+    if vectorized: return vectorized
+
     i = start_value.value
 
     if step_value.value >= 0:
@@ -2419,6 +5564,45 @@ class Interpreter:
       List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
     )
 
+  def visit_ForInNode(self, node, context):
+    res = RuntimeResult()
+    elements = []
+
+    iterable = res.register(self.visit(node.iterable_node, context))
+    if res.should_return(): return res
+
+    iterator = iterable.iterate()
+    if iterator is None:
+      return res.failure(RTError(
+        node.iterable_node.pos_start, node.iterable_node.pos_end,
+        'Value is not iterable',
+        context
+      ))
+
+    var_name = node.var_name_tok.value
+
+    try:
+      for element in iterator:
+        context.symbol_table.set(var_name, element)
+
+        value = res.register(self.visit(node.body_node, context))
+        if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
+
+        if res.loop_should_continue:
+          continue
+
+        if res.loop_should_break:
+          break
+
+        elements.append(value)
+    except IterationError as e:
+      return res.failure(e.error)
+
+    return res.success(
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
   def visit_WhileNode(self, node, context):
     res = RuntimeResult()
     elements = []
@@ -2452,13 +5636,45 @@ class Interpreter:
     func_name = node.var_name_tok.value if node.var_name_tok else None
     body_node = node.body_node
     arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-    func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+    func_value = Function(func_name, body_node, arg_names, node.should_auto_return, node.is_generator).set_context(context).set_pos(node.pos_start, node.pos_end)
     
     if node.var_name_tok:
       context.symbol_table.set(func_name, func_value)
 
     return res.success(func_value)
 
+  def visit_RecordDefNode(self, node, context):
+    # The layout is created once per declaration, so re-running it keeps records comparable
+    if node.layout is None:
+      node.layout = RecordLayout(node.record_name_tok.value, tuple(tok.value for tok in node.field_name_toks))
+
+    record_type = RecordType(node.layout).set_context(context).set_pos(node.pos_start, node.pos_end)
+    context.symbol_table.set(node.layout.name, record_type)
+    return RuntimeResult().success(record_type)
+
+  def visit_FieldAccessNode(self, node, context):
+    res = RuntimeResult()
+
+    record = res.register(self.visit(node.record_node, context))
+    if res.should_return(): return res
+
+    field_name = node.field_name_tok.value
+    if not isinstance(record, Record):
+      return res.failure(RTError(
+        node.pos_start, node.pos_end,
+        f"Cannot read field '{field_name}' of a value that is not a record",
+        context
+      ))
+
+    value = record.field(field_name, node.offset)
+    if value is None:
+      return res.failure(RTError(
+        node.field_name_tok.pos_start, node.field_name_tok.pos_end,
+        f"Record {record.layout.name} has no field '{field_name}'",
+        context
+      ))
+    return res.success(value)
+
   def visit_CallNode(self, node, context):
     res = RuntimeResult()
     args = []
@@ -2476,6 +5692,83 @@ class Interpreter:
     return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
     return res.success(return_value)
 
+  def visit_PipeNode(self, node, context):
+    res = RuntimeResult()
+
+    value = res.register(self.visit(node.source_node, context))
+    if res.should_return(): return res
+
+    for stage_node in node.stage_nodes:
+      if (
+        isinstance(stage_node, CallNode) and
+        isinstance(stage_node.node_to_call, VarAccessNode) and
+        stage_node.node_to_call.var_name_tok.value in Pipeline.STAGE_NAMES
+      ):
+        value = res.register(self.build_pipeline_stage(value, stage_node, context))
+        if res.should_return(): return res
+        continue
+
+      # Any other stage is a call with the piped value as its first argument
+      if isinstance(stage_node, CallNode):
+        callee_node, arg_nodes = stage_node.node_to_call, stage_node.arg_nodes
+      else:
+        callee_node, arg_nodes = stage_node, []
+
+      value_to_call = res.register(self.visit(callee_node, context))
+      if res.should_return(): return res
+      value_to_call = value_to_call.copy().set_pos(stage_node.pos_start, stage_node.pos_end)
+
+      args = [value]
+      for arg_node in arg_nodes:
+        args.append(res.register(self.visit(arg_node, context)))
+        if res.should_return(): return res
+
+      value = res.register(value_to_call.execute(args))
+      if res.should_return(): return res
+      value = value.copy().set_pos(stage_node.pos_start, stage_node.pos_end).set_context(context)
+
+    return res.success(value.set_pos(node.pos_start, node.pos_end))
+
+  def build_pipeline_stage(self, value, stage_node, context):
+    res = RuntimeResult()
+    name = stage_node.node_to_call.var_name_tok.value
+
+    if len(stage_node.arg_nodes) != 1:
+      return res.failure(RTError(
+        stage_node.pos_start, stage_node.pos_end,
+        f"{name} stage takes exactly 1 argument",
+        context
+      ))
+
+    argument = res.register(self.visit(stage_node.arg_nodes[0], context))
+    if res.should_return(): return res
+
+    if name == 'TAKE':
+      if not isinstance(argument, Number) or not isinstance(argument.value, int):
+        return res.failure(RTError(
+          stage_node.pos_start, stage_node.pos_end,
+          "TAKE stage argument must be an integer",
+          context
+        ))
+      argument = argument.value
+    elif not isinstance(argument, BaseFunction):
+      return res.failure(RTError(
+        stage_node.pos_start, stage_node.pos_end,
+        f"{name} stage argument must be a function",
+        context
+      ))
+
+    if not isinstance(value, Pipeline):
+      if value.iterate() is None:
+        return res.failure(RTError(
+          stage_node.pos_start, stage_node.pos_end,
+          "Pipeline source must be iterable",
+          context
+        ))
+      value = Pipeline(value)
+
+    return res.success(value.with_stage(name, argument).set_context(context))
+
   def visit_ReturnNode(self, node, context):
     res = RuntimeResult()
 
@@ -2487,6 +5780,23 @@ class Interpreter:
     
     return res.success_return(value)
 
+  def visit_YieldNode(self, node, context):
+    res = RuntimeResult()
+
+    value = res.register(self.visit(node.node_to_yield, context))
+    if res.should_return(): return res
+
+    if context.generator is None:
+      return res.failure(RTError(
+        node.pos_start, node.pos_end,
+        "'YIELD' outside of a generator function",
+        context
+      ))
+
+    if not context.generator.yield_value(value):
+      return res.success_return(Number.null)
+    return res.success(Number.null)
+
   def visit_ContinueNode(self, node, context):
     return RuntimeResult().success_continue()
 
@@ -2499,37 +5809,138 @@ class Interpreter:
 #####   The run function is the main function of the interpreter.
 #################################################################################################
 
-global_symbol_table = SymbolTable()
-global_symbol_table.set("NULL", Number.null)
-global_symbol_table.set("FALSE", Number.false)
-global_symbol_table.set("TRUE", Number.true)
-global_symbol_table.set("MATH_PI", Number.math_PI)
-global_symbol_table.set("PRINT", BuiltInFunction.print)
-global_symbol_table.set("PRINT_RET", BuiltInFunction.print_ret)
-global_symbol_table.set("INPUT", BuiltInFunction.input)
-global_symbol_table.set("INPUT_INT", BuiltInFunction.input_int)
-global_symbol_table.set("CLEAR", BuiltInFunction.clear)
-global_symbol_table.set("CLS", BuiltInFunction.clear)
-global_symbol_table.set("IS_NUM", BuiltInFunction.is_number)
-global_symbol_table.set("IS_STR", BuiltInFunction.is_string)
-global_symbol_table.set("IS_LIST", BuiltInFunction.is_list)
-global_symbol_table.set("IS_FUN", BuiltInFunction.is_function)
-global_symbol_table.set("APPEND", BuiltInFunction.append)
-global_symbol_table.set("POP", BuiltInFunction.pop)
-global_symbol_table.set("EXTEND", BuiltInFunction.extend)
-global_symbol_table.set("LEN", BuiltInFunction.len)
-global_symbol_table.set("RUN", BuiltInFunction.run)
-
-def run(fn, text):
-  """
-    Runs the interpreter on the input text.
-    
+# Built-ins and constants live in their own layer below the globals, so built-ins registered with
+# @builtin after the module is loaded are visible to programs as well, and a compiled program can
+# execute in a fresh global scope over this layer.
+builtin_symbol_table = SymbolTable()
+builtin_symbol_table.symbols = BUILTINS
+builtin_symbol_table.set("NULL", Number.null)
+builtin_symbol_table.set("FALSE", Number.false)
+builtin_symbol_table.set("TRUE", Number.true)
+builtin_symbol_table.set("MATH_PI", Number.math_PI)
+
+global_symbol_table = SymbolTable(builtin_symbol_table)
+
+class Program:
+  """
+    A parsed program, which can be executed any number of times without lexing and parsing
+    its text again.
+
+    Attributes:
+        fn (str): The filename or filepath associated with the program text.
+        node (Node): The root node of the program's AST.
+  """
+  def __init__(self, fn, node):
+    self.fn = fn
+    self.node = node
+
+  def execute(self, env=None, inputs=None, output=None, buffer_size=OUTPUT_BUFFER_SIZE, input_source=None, vectorizer=None):
+    """
+      Executes the program.
+
+      Args:
+          env (SymbolTable): The global scope to execute in. By default each execution gets a
+              new one over the built-ins, so executions don't see each other's variables.
+          inputs (dict): Python values to define as globals before executing, by name.
+          output, buffer_size, input_source: Where PRINT writes and INPUT reads, as for run.
+          vectorizer (LoopVectorizer): The vectorizer for FOR loops. Defaults to loop_vectorizer.
+
+      Returns:
+          tuple: The result of the program and an error, one of which is None.
+    """
+    if env is None:
+      env = SymbolTable(builtin_symbol_table)
+    if inputs:
+      for name, value in inputs.items():
+        env.set(name, from_python(value))
+
+    interpreter = Interpreter()
+    context = program_context(env, output, buffer_size, input_source, vectorizer)
+    try:
+      result = interpreter.visit(self.node, context)
+    finally:
+      context.output.flush()
+
+    return result.value, result.error
+
+  def evaluate_batch(self, columns, env=None, output=None, buffer_size=OUTPUT_BUFFER_SIZE, input_source=None, vectorizer=None):
+    """
+      Evaluates the program once for every row of a batch of input columns.
+
+      A program that is a single pure numeric expression is evaluated a column at a time by the
+      loop vectorizer. Anything else, or a batch the vectorizer gives up on, runs row by row with
+      the row's values defined as globals.
+
+      Args:
+          columns (dict): Maps variable names to sequences of Python values, all of the same length.
+          env (SymbolTable): The scope every row is evaluated over. Defaults to the built-ins.
+          output, buffer_size, input_source, vectorizer: As for execute.
+
+      Returns:
+          tuple: A list with the value of the program's last statement for every row, and an
+              error, one of which is None.
+    """
+    if env is None:
+      env = SymbolTable(builtin_symbol_table)
+    columns = {
+      name: column.tolist() if numpy is not None and isinstance(column, numpy.ndarray) else list(column)
+      for name, column in columns.items()
+    }
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+      raise ValueError("Columns must all have the same length")
+    length = lengths.pop() if lengths else 0
+
+    statements = self.node.element_nodes if isinstance(self.node, ListNode) else [self.node]
+    context = program_context(env, output, buffer_size, input_source, vectorizer)
+
+    if len(statements) == 1:
+      column = context.vectorizer.try_batch(statements[0], context, columns, length)
+      if column is not None: return column, None
+
+    interpreter = Interpreter()
+    names = list(columns)
+    results = []
+    try:
+      for row in zip(*columns.values()) if names else repeat((), length):
+        context.symbol_table = SymbolTable(env)
+        for name, value in zip(names, row):
+          context.symbol_table.set(name, from_python(value))
+
+        result = interpreter.visit(self.node, context)
+        if result.error: return None, result.error
+
+        value = result.value
+        if isinstance(self.node, ListNode):
+          value = value.elements[-1] if value.elements else Number.null
+        results.append(to_python(value))
+    finally:
+      context.output.flush()
+
+    return results, None
+
+def program_context(env, output, buffer_size, input_source, vectorizer=None):
+  """
+    Returns the top-level context a program executes in.
+  """
+  context = Context('<program>')
+  context.symbol_table = env
+  context.output = output if isinstance(output, OutputSink) else OutputSink(output, buffer_size)
+  context.input = input_source if isinstance(input_source, InputSource) else InputSource(input_source)
+  if vectorizer is not None:
+    context.vectorizer = vectorizer
+  return context
+
+def compile(fn, text):
+  """
+    Lexes and parses the input text once, so that it can be executed many times.
+
     Args:
         fn (str): The filename or filepath associated with the input text.
-        text (str): The input text to be interpreted.
-    
+        text (str): The program text.
+
     Returns:
-        Any: The result of interpreting the input text.
+        tuple: The Program and an error, one of which is None.
   """
   # Generate tokens
   lexer = Lexer(fn, text)
@@ -2541,10 +5952,86 @@ def run(fn, text):
   ast = parser.parse()
   if ast.error: return None, ast.error
 
-  # Run program
-  interpreter = Interpreter()
-  context = Context('<program>')
-  context.symbol_table = global_symbol_table
-  result = interpreter.visit(ast.node, context)
+  return Program(fn, ast.node), None
 
-  return result.value, result.error
\ No newline at end of file
+def run(fn, text, output=None, buffer_size=OUTPUT_BUFFER_SIZE, input_source=None):
+  """
+    Runs the interpreter on the input text, in the global scope shared by every run.
+    
+    Args:
+        fn (str): The filename or filepath associated with the input text.
+        text (str): The input text to be interpreted.
+        output: Where PRINT writes to: an OutputSink, a file-like object, a callable taking
+            chunks of text, or None for sys.stdout. Buffered output is flushed before returning.
+        buffer_size (int): Buffer size of the sink created for output when it is not a sink.
+        input_source: Where INPUT and the other input builtins read from: an InputSource, a
+            file-like object, or None for sys.stdin.
+    
+    Returns:
+        Any: The result of interpreting the input text.
+  """
+  program, error = compile(fn, text)
+  if error: return None, error
+
+  return program.execute(global_symbol_table, None, output, buffer_size, input_source)
+
+class Engine:
+  """
+    An interpreter instance with its own globals, built-ins, output and input, so that several
+    engines can run programs side by side, for example one per thread of a thread pool. A single
+    engine runs one program at a time.
+
+    The engine's built-in layer sits over the shared layer of BUILTINS and the constants, which
+    programs never write to, so a new engine or environment is just a new empty symbol table.
+
+    Attributes:
+        builtins (SymbolTable): Values exposed to this engine's programs only.
+        globals (SymbolTable): The global scope run() executes in, shared by its runs like the
+            module-level global_symbol_table.
+        output (OutputSink): Where the engine's programs print to.
+        input (InputSource): Where the engine's programs read input from.
+        vectorizer (LoopVectorizer): The engine's loop vectorizer, with its own report.
+  """
+  def __init__(self, output=None, buffer_size=OUTPUT_BUFFER_SIZE, input_source=None):
+    self.builtins = SymbolTable(builtin_symbol_table)
+    self.globals = SymbolTable(self.builtins)
+    self.output = output if isinstance(output, OutputSink) else OutputSink(output, buffer_size)
+    self.input = input_source if isinstance(input_source, InputSource) else InputSource(input_source)
+    self.vectorizer = LoopVectorizer()
+
+  def expose(self, name, value):
+    """
+      Makes a Python callable or object available to this engine's programs under name.
+    """
+    return expose(name, value, self.builtins)
+
+  def environment(self):
+    """
+      Returns a new, empty global scope over the engine's built-ins.
+    """
+    return SymbolTable(self.builtins)
+
+  def run(self, fn, text):
+    """
+      Runs the input text in the engine's globals, like the module-level run.
+    """
+    program, error = compile(fn, text)
+    if error: return None, error
+
+    return self.execute(program, self.globals)
+
+  def execute(self, program, env=None, inputs=None):
+    """
+      Executes a compiled program, in a new environment unless env is given.
+    """
+    if env is None:
+      env = self.environment()
+    return program.execute(env, inputs, self.output, input_source=self.input, vectorizer=self.vectorizer)
+
+  def evaluate_batch(self, program, columns, env=None):
+    """
+      Evaluates a compiled program once for every row of columns, as Program.evaluate_batch.
+    """
+    if env is None:
+      env = self.environment()
+    return program.evaluate_batch(columns, env, self.output, input_source=self.input, vectorizer=self.vectorizer)
\ No newline at end of file